@@ -0,0 +1,83 @@
+import os
+import argparse
+from sqlalchemy import create_engine, inspect, text
+from urllib.parse import quote_plus
+from dotenv import load_dotenv
+
+# One-time migration of tables created before the collectors wrote upserts.
+# Usage: python 1.1.migrate_upsert_keys.py [--apply]
+#
+# Adds the bucket column, backfills it from the row time, removes older rows that
+# share a (name, bucket) key and creates the unique index the collectors'
+# INSERT ... ON CONFLICT needs. Without --apply it only reports what would change.
+# Until a table is migrated its collector keeps appending plain rows.
+
+# Load environment variables
+load_dotenv()
+
+db_config = {
+    'username': os.getenv('DB_USERNAME'),
+    'password': os.getenv('DB_PASSWORD'),
+    'host': os.getenv('DB_HOST'),
+    'port': os.getenv('DB_PORT', 5432),
+    'database': os.getenv('DB_NAME'),
+    'table_name': os.getenv('DB_TABLE_NAME', 'server_metrics')
+}
+
+# Must match WRITE_BUCKET of the collectors
+WRITE_BUCKET = os.getenv('WRITE_BUCKET', 'minute')
+
+# table -> (name column, time column, unique index)
+TABLES = {
+    db_config['table_name']: ('server_name', 'datetime_record', f"{db_config['table_name']}_server_bucket_key"),
+    'cloudera_service_status': ('service_name', 'timestamp', 'cloudera_service_status_service_bucket_key'),
+}
+
+def migrate(engine, table, name_column, time_column, index_name, apply):
+    """Migrate one table to the (name, bucket) unique key; returns False if it was skipped."""
+    inspector = inspect(engine)
+    if not inspector.has_table(table):
+        print(f"{table}: does not exist, the collector creates it with the key.")
+        return False
+    if any(ix['name'] == index_name for ix in inspector.get_indexes(table)):
+        print(f"{table}: already migrated.")
+        return False
+
+    bucket = f"date_trunc(:unit, {time_column})"
+    has_bucket = any(col['name'] == 'bucket' for col in inspector.get_columns(table))
+    key = f"{name_column}, COALESCE(bucket, {bucket})" if has_bucket else f"{name_column}, {bucket}"
+
+    with engine.begin() as conn:
+        total, duplicates = conn.execute(text(f"""
+            SELECT COUNT(*), COUNT(*) - COUNT(DISTINCT ({key})) FROM {table}
+        """), {'unit': WRITE_BUCKET}).one()
+        print(f"{table}: {total} rows, {duplicates} older duplicates per ({name_column}, {WRITE_BUCKET} bucket)")
+        if not apply:
+            return True
+
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS bucket TIMESTAMP"))
+        conn.execute(text(f"UPDATE {table} SET bucket = {bucket} WHERE bucket IS NULL"), {'unit': WRITE_BUCKET})
+        # Keep the newest row of every (name, bucket)
+        conn.execute(text(f"""
+            DELETE FROM {table} a USING {table} b
+            WHERE a.{name_column} = b.{name_column} AND a.bucket = b.bucket
+              AND (a.{time_column}, a.ctid) < (b.{time_column}, b.ctid)
+        """))
+        conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table} ({name_column}, bucket)"))
+    print(f"✅ {table}: unique key ({name_column}, bucket) created.")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate collector tables to (name, bucket) upsert keys")
+    parser.add_argument("--apply", action="store_true", help="perform the migration instead of only reporting")
+    args = parser.parse_args()
+
+    encoded_password = quote_plus(db_config['password'])
+    engine = create_engine(f"postgresql://{db_config['username']}:{encoded_password}@{db_config['host']}:{db_config['port']}/{db_config['database']}")
+
+    pending = [migrate(engine, table, *spec, apply=args.apply) for table, spec in TABLES.items()]
+    if any(pending) and not args.apply:
+        print("Dry run only; rerun with --apply to migrate.")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,23 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import paramiko
 import os 
+import sys
 from dotenv import load_dotenv  
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects.postgresql import insert
 from urllib.parse import quote_plus
 
 # Load environment variables from .env file 
 load_dotenv()
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.alerts import AlertEngine
+from common.inventory import SERVER_GROUPS, server_list
+from common.dashboard_push import push_to_dashboard
+
 # read the database configuration from the environment variables
 db_config = {
     'username': os.getenv('DB_USERNAME'),
@@ -26,6 +35,20 @@ encoded_password = quote_plus(db_config['password'])
 connection_uri = f"postgresql://{db_config['username']}:{encoded_password}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
 engine = create_engine(connection_uri)
 
+# Rows are keyed by (server_name, bucket): a rerun or backfill inside the same
+# bucket updates the existing row instead of adding a duplicate. The collector runs
+# every few minutes, so the default keeps every scheduled run as its own row.
+WRITE_BUCKET = os.getenv('WRITE_BUCKET', 'minute')  # minute, hour or day
+BUCKET_FREQ = {'minute': 'min', 'hour': 'h', 'day': 'D'}
+KEY_COLUMNS = ['server_name', 'bucket']
+
+# Append-only Parquet store read by 2.image_gen.py, one date partition per day
+STATS_STORE_DIR = os.getenv('STATS_STORE_DIR', '/home/user/airflow/maintain/maintain/maintain/server_stats_store')
+STATS_STORE_GROUPS = {
+    'Talend_Group': SERVER_GROUPS['talend'],
+    'Hadoop_System_Group': SERVER_GROUPS['hadoop'],
+}
+
 class Server:
     def __init__(self, name, ip, username_env, password_env):
         self.name = name
@@ -89,21 +112,73 @@ def write_to_db(df):
     except Exception as e:
         print(f"Error writing data to the database: {e}")
 
-# Server details
-server_list = [
-    {"name": "BI Server", "ip": "10.104.5.86", "username_env": "BI_SERVER_USER", "password_env": "BI_SERVER_PASS"},
-    {"name": "Talend Server 1", "ip": "10.104.5.87", "username_env": "TALEND1_USER", "password_env": "TALEND1_PASS"},
-    {"name": "Talend Server 2", "ip": "10.104.5.88", "username_env": "TALEND2_USER", "password_env": "TALEND2_PASS"},
-    {"name": "Scheduler Server", "ip": "10.104.5.89", "username_env": "SCHEDULER_USER", "password_env": "SCHEDULER_PASS"},
-    {"name": "Repo Server", "ip": "10.104.5.80", "username_env": "REPO_USER", "password_env": "REPO_PASS"},
-    {"name": "Datanode 1", "ip": "10.104.117.134", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
-    {"name": "Datanode 2", "ip": "10.104.117.143", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
-    {"name": "Datanode 3", "ip": "10.104.117.145", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
-    {"name": "Gatewaynode", "ip": "10.104.117.129", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
-    {"name": "Activenode", "ip": "10.104.117.131", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
-    {"name": "Standbynode", "ip": "10.104.117.132", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
-    {"name": "Backup", "ip": "10.104.5.161", "username_env": "BACKUP_USER", "password_env": "BACKUP_PASS"}
-]
+def upsert_on_conflict(pd_table, conn, keys, data_iter):
+    """pandas to_sql method: one INSERT ... ON CONFLICT (server_name, bucket) DO UPDATE per chunk."""
+    rows = [dict(zip(keys, row)) for row in data_iter]
+    stmt = insert(pd_table.table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={col: stmt.excluded[col] for col in keys if col not in KEY_COLUMNS}
+    )
+    return conn.execute(stmt).rowcount
+
+def ensure_upsert_key(df, table_name):
+    """
+    Create a new table with the (server_name, bucket) unique key; return whether upserts are possible.
+
+    An existing table without the key is never changed here: it is migrated once
+    with 1.1.migrate_upsert_keys.py, and until then rows are appended as before.
+    """
+    index_name = f"{table_name}_server_bucket_key"
+    if not inspect(engine).has_table(table_name):
+        with engine.begin() as conn:
+            df.head(0).to_sql(name=table_name, con=conn, index=False)
+            conn.execute(text(f"CREATE UNIQUE INDEX {index_name} ON {table_name} (server_name, bucket)"))
+        return True
+    if any(ix['name'] == index_name for ix in inspect(engine).get_indexes(table_name)):
+        return True
+
+    print(f"❌ {table_name} has no (server_name, bucket) key; run 1.1.migrate_upsert_keys.py. Appending instead.")
+    return False
+
+def upsert_to_db(df, table_name):
+    """Write the samples idempotently, batched by chunk."""
+    df = df.copy()
+    df['bucket'] = df['datetime_record'].dt.floor(BUCKET_FREQ[WRITE_BUCKET])
+    df = df.drop_duplicates(subset=KEY_COLUMNS, keep='last')
+
+    if not ensure_upsert_key(df, table_name):
+        df.drop(columns='bucket').to_sql(name=table_name, con=engine, if_exists='append', index=False, chunksize=500)
+        return
+    df.to_sql(name=table_name, con=engine, if_exists='append', index=False,
+              chunksize=500, method=upsert_on_conflict)
+
+def write_to_stats_store(df):
+    """Append the snapshot to the Parquet store as a new file in today's partition of each group."""
+    snapshot = df.rename(columns={
+        "server_name": "Name",
+        "datetime_record": "Date",
+        "cpu_usage_percent": "useCPU(%)",
+        "used_ram_gb": "usedRam(GB)",
+        "total_ram_gb": "maxRam(GB)",
+        "used_ram_percent": "useRam(%)",
+        "used_disk_gb": "useDisk(GB)",
+        "used_disk_percent": "useDisk(%)"
+    }).drop(columns=["ip", "total_disk_gb"])
+    snapshot["Date"] = snapshot["Date"].dt.floor("min")
+
+    run_time = snapshot["Date"].max()
+    try:
+        for group, pattern in STATS_STORE_GROUPS.items():
+            group_df = snapshot[snapshot["Name"].str.contains(pattern, na=False)]
+            partition_dir = os.path.join(STATS_STORE_DIR, group, f"date={run_time:%Y-%m-%d}")
+            os.makedirs(partition_dir, exist_ok=True)
+
+            table = pa.Table.from_pandas(group_df, preserve_index=False)
+            pq.write_table(table, os.path.join(partition_dir, f"part-{run_time:%H%M%S}.parquet"))
+        print("Snapshot appended to the stats store.")
+    except Exception as e:
+        print(f"Error writing snapshot to the stats store: {e}")
 
 def main():
     results = []
@@ -125,15 +200,26 @@ def main():
     df["used_ram_percent"] = ((df["used_ram_gb"] / df["total_ram_gb"]) * 100).round(2)
     df["used_disk_percent"] = (df["used_disk_gb"] / df["total_disk_gb"]) * 100
 
-    df["used_ram_percent"] = df["used_ram_percent"].replace([float('inf'), -float('inf')], 0).fillna(0)
-    df["used_disk_percent"] = df["used_disk_percent"].fillna(0).round(2)
+    # Unreachable hosts keep NaN metrics; a 0 would read as a real sample downstream
+    df["used_ram_percent"] = df["used_ram_percent"].replace([float('inf'), -float('inf')], float('nan'))
+    df["used_disk_percent"] = df["used_disk_percent"].replace([float('inf'), -float('inf')], float('nan')).round(2)
 
     df['datetime_record'] = pd.Timestamp.now()
 
     print(df)
-    df.to_sql(name=db_config['table_name'], con=engine, if_exists='append', index=False)
+
+    # Hosts that could not be read are left out of alerting; a missing sample must not resolve a firing alert
+    collected = df[["total_ram_gb", "used_ram_gb", "total_disk_gb", "used_disk_gb"]].notna().all(axis=1)
+    alerts = AlertEngine('server_metrics')
+    alerts.evaluate_frame(df[collected], 'server_name', 'datetime_record')
+    alerts.flush()
+
+    upsert_to_db(df, db_config['table_name'])
     
     print("Data successfully written to the database.")
 
+    write_to_stats_store(df)
+    push_to_dashboard('server_metrics', df)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,54 @@
+import os
+import sys
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# One-time import of the legacy server_stats.xlsx workbook into the Parquet store
+# read by 2.image_gen.py. Usage: python 2.1.import_server_stats.py [workbook.xlsx]
+file_path = '/home/user/airflow/maintain/maintain/maintain/server_stats.xlsx'
+store_path = os.getenv('STATS_STORE_DIR', '/home/user/airflow/maintain/maintain/maintain/server_stats_store')
+
+SHEETS = ['Talend_Group', 'Hadoop_System_Group']
+METRIC_COLUMNS = ['useCPU(%)', 'usedRam(GB)', 'maxRam(GB)', 'useRam(%)', 'useDisk(GB)', 'useDisk(%)']
+
+def read_sheet(file_path, sheet_name):
+    """Read one sheet and normalize it to the store schema."""
+    df = pd.read_excel(file_path, sheet_name=sheet_name)
+
+    # Talend_Group has " useRam(%)" with a leading space
+    df.columns = [str(col).strip() for col in df.columns]
+    df['Date'] = pd.to_datetime(df['Date'], format="%d-%m-%Y %H:%M", errors="coerce")
+    df = df.dropna(subset=['Date'])
+
+    # Mixed text/number columns from Excel cannot be written as a single Arrow type;
+    # metrics stay numeric (stray text becomes NaN) so the report colouring can compare them
+    for col in df.columns.drop('Date'):
+        if col in METRIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        elif df[col].dtype == object:
+            df[col] = df[col].astype(str)
+
+    return df
+
+def write_partitions(df, group_path):
+    """Write one Parquet file per day under <store>/<group>/date=YYYY-MM-DD/."""
+    for day, day_df in df.groupby(df['Date'].dt.strftime('%Y-%m-%d')):
+        partition_dir = os.path.join(group_path, f"date={day}")
+        os.makedirs(partition_dir, exist_ok=True)
+
+        table = pa.Table.from_pandas(day_df.sort_values('Date'), preserve_index=False)
+        pq.write_table(table, os.path.join(partition_dir, 'part-import.parquet'))
+
+    print(f"✅ Imported {len(df)} rows into {df['Date'].dt.date.nunique()} partitions under {group_path}")
+
+def main():
+    workbook = sys.argv[1] if len(sys.argv) > 1 else file_path
+
+    for sheet_name in SHEETS:
+        df = read_sheet(workbook, sheet_name)
+        print(f"{sheet_name}: {len(df)} rows")
+        write_partitions(df, os.path.join(store_path, sheet_name))
+
+if __name__ == "__main__":
+    main()
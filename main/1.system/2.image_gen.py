@@ -1,31 +1,31 @@
-import pandas as pd
+import pyarrow.parquet as pq
 import matplotlib.pyplot as plt
 from datetime import datetime
 import os
-# excel ไม่ได้เอา เวลามาด้วยนะ 
-# Read data from Excel file
-file_path = '/home/user/airflow/maintain/maintain/maintain/server_stats.xlsx'
-
-# Assuming there are two sheets named 'Talend_Group' and 'Hadoop_System_Group'
-Talend_Group_df = pd.read_excel(file_path, sheet_name='Talend_Group')
-Hadoop_System_Group_df = pd.read_excel(file_path, sheet_name='Hadoop_System_Group')
-Talend_Group_df['Date'] = pd.to_datetime(Talend_Group_df['Date'], format="%d-%m-%Y %H:%M", errors="coerce")
-Hadoop_System_Group_df['Date'] = pd.to_datetime(Hadoop_System_Group_df['Date'], format="%d-%m-%Y %H:%M", errors="coerce")
-
-# Get current date and time
-max_date = Talend_Group_df['Date'].max()
-# Filter data for the current date
-Talend_Group_df = Talend_Group_df[Talend_Group_df['Date'] == max_date]
-Hadoop_System_Group_df = Hadoop_System_Group_df[Hadoop_System_Group_df['Date'] == max_date]
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.image_output import save_figure
+
+# Read data from the date-partitioned Parquet store (see 2.1.import_server_stats.py)
+# Layout: <store>/<group>/date=YYYY-MM-DD/part-*.parquet, one file per collection run
+store_path = os.getenv('STATS_STORE_DIR', '/home/user/airflow/maintain/maintain/maintain/server_stats_store')
+
+def read_latest_snapshot(group_path):
+    """Read only the newest date partition of a group and keep the rows of its latest run."""
+    partitions = sorted(d for d in os.listdir(group_path) if d.startswith('date='))
+    if not partitions:
+        raise FileNotFoundError(f"No partitions found in {group_path}")
+
+    df = pq.read_table(os.path.join(group_path, partitions[-1])).to_pandas()
+    return df[df['Date'] == df['Date'].max()]
+
+Talend_Group_df = read_latest_snapshot(os.path.join(store_path, 'Talend_Group'))
+Hadoop_System_Group_df = read_latest_snapshot(os.path.join(store_path, 'Hadoop_System_Group'))
 
 Talend_Group_df['Date'] = Talend_Group_df['Date'].dt.strftime('%Y-%m-%d %H:%M')
 Hadoop_System_Group_df['Date'] = Hadoop_System_Group_df['Date'].dt.strftime('%Y-%m-%d %H:%M')
 
 # Debug
-# Raname Talend Group df becuase hte useRam(%) is have " useRam(%)"
-Talend_Group_df.rename(columns={
-    ' useRam(%)': 'useRam(%)',
-}, inplace=True)
 print("Talend_Group_df")
 print(Talend_Group_df)
 print(Talend_Group_df.info())
@@ -99,6 +99,6 @@ plt.tight_layout()
 now = datetime.now()
 current_date = now.strftime("%d-%m-%Y %H:%M")
 output_image_file = f'/home/user/airflow/maintain/maintain/maintain/server_stats_visualization_{current_date}.png'
-plt.savefig(output_image_file, dpi=300)
+output_image_file = save_figure(fig, output_image_file, n_rows=len(Talend_Group_df) + len(Hadoop_System_Group_df))
 
 print("Plot saved as:", output_image_file)
@@ -1,12 +1,19 @@
 import os
+import sys
+import mimetypes
 import pandas as pd
 import requests
 import matplotlib.pyplot as plt
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from urllib.parse import quote_plus
 from dotenv import load_dotenv  
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.report_cache import WatermarkCache
+from common.stream_read import latest_per_key
+from common.image_output import save_figure
+
 # Load environment variables
 load_dotenv()
 
@@ -36,7 +43,7 @@ def send_mattermost_notification(message, image_path):
     # Upload the image to Mattermost
     file_url = 'https://chat.rtarf.mi.th/api/v4/files'
     with open(image_path, 'rb') as image_file:
-        files = {'files': (image_path, image_file, 'image/png')}
+        files = {'files': (os.path.basename(image_path), image_file, mimetypes.guess_type(image_path)[0])}
         file_data = {'channel_id': MATTERMOST_CHANNEL_ID}
         
         file_response = requests.post(file_url, headers={'Authorization': f'Bearer {MATTERMOST_TOKEN}'}, files=files, data=file_data)
@@ -81,24 +88,45 @@ encoded_password = quote_plus(db_config['password'])
 connection_uri = f"postgresql+psycopg2://{db_config['user']}:{encoded_password}@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
 engine = create_engine(connection_uri)
 
+# Local copy of the last 7 days; each run only pulls rows newer than the cached ones
+server_metrics_cache = WatermarkCache("server_metrics", "datetime_record", ["server_name", "bucket"], window_days=7)
+
 def fetch_server_metrics():
-    """Fetch server metrics from the database."""
-    query = """
+    """Fetch the most recent record per server of the last 7 days through the local cache."""
+    query = text("""
     SELECT server_name, cpu_usage_percent, total_ram_gb, used_ram_gb, used_ram_percent, 
-           total_disk_gb, used_disk_gb, used_disk_percent, datetime_record
+           total_disk_gb, used_disk_gb, used_disk_percent, datetime_record, bucket
     FROM server_metrics 
-    WHERE datetime_record >= NOW() - INTERVAL '7 days'
-    ORDER BY datetime_record DESC;
-    """
+    WHERE datetime_record > :since;
+    """)
     
     try:
-        with engine.connect() as connection:
-            df = pd.read_sql(query, con=connection)
-        return df
+        server_metrics_cache.refresh(engine, query, categorical=["server_name"])
+        batches = server_metrics_cache.iter_batches(categorical=["server_name"])
+        df = latest_per_key(batches, "server_name", "datetime_record")
+        if df.empty:
+            return df
+        return df.drop(columns="bucket")
     except Exception as e:
         print(f"Database connection error: {e}")
         return None
 
+def fetch_disk_forecast():
+    """Fetch the latest days-until-full forecast per server written by 4.disk_forecast.py."""
+    query = """
+    SELECT DISTINCT ON (target) target AS server_name, days_until_full
+    FROM disk_forecast
+    WHERE kind = 'server'
+    ORDER BY target, datetime_record DESC;
+    """
+
+    try:
+        with engine.connect() as connection:
+            return pd.read_sql(query, con=connection)
+    except Exception as e:
+        print(f"Disk forecast not available: {e}")
+        return None
+
 def create_table_with_border(df, ax):
     """Creates a table visualization with colored cells."""
     df = df.rename(columns={
@@ -108,7 +136,8 @@ def create_table_with_border(df, ax):
         "used_ram_gb": "usedRam(GB)",
         "total_ram_gb": "maxRam(GB)",
         "used_disk_gb": "useDisk(GB)",
-        "used_disk_percent": "useDisk(%)"
+        "used_disk_percent": "useDisk(%)",
+        "days_until_full": "fullIn(days)"
     })
 
     data = [df.columns.tolist()] + df.values.tolist()
@@ -132,21 +161,28 @@ def create_table_with_border(df, ax):
             if col_name == "useDisk(%)" and isinstance(val, (int, float)) and val > 70:
                 cell.set_facecolor("yellow")
 
-df = fetch_server_metrics()
+def render_report():
+    """Render the server snapshot table and return the image path, or None when there is no data."""
+    df = fetch_server_metrics()
+
+    if df is None or df.empty:
+        print("No data retrieved from the database.")
+        return None
 
-if df is not None and not df.empty:
     df["datetime_record"] = pd.to_datetime(df["datetime_record"])
 
     # Adjust datetime to always be 08:00 AM
     df["datetime_record"] = df["datetime_record"].dt.date.astype(str) + " 08:00"
     df["datetime_record"] = pd.to_datetime(df["datetime_record"])
 
-    # Select the most recent record per server
-    df = df.loc[df.groupby("server_name")["datetime_record"].idxmax()].reset_index(drop=True)
-
     df["server_name"] = pd.Categorical(df["server_name"], categories=SERVER_ORDER, ordered=True)
     df = df.sort_values("server_name")
 
+    forecast_df = fetch_disk_forecast()
+    if forecast_df is not None:
+        df = df.merge(forecast_df, on="server_name", how="left")
+        df["days_until_full"] = df["days_until_full"].fillna("-")
+
     numeric_columns = ["cpu_usage_percent", "used_ram_gb", "total_ram_gb", "used_disk_gb", "used_disk_percent"]
     df[numeric_columns] = df[numeric_columns].round(2)
 
@@ -165,15 +201,19 @@ if df is not None and not df.empty:
 
     current_date = datetime.now().strftime("%Y-%m-%d_%H-%M")
     output_image_file = os.path.join(RESULT_DIR, f'server_stats_visualization_{current_date}.png')
-    plt.savefig(output_image_file, dpi=300)
+    output_image_file = save_figure(fig, output_image_file, n_rows=len(df))
+    plt.close(fig)
     
     print("✅ Plot saved:", output_image_file)
 
-    # Send Mattermost notification
-    message = f"📊 **Server Resource Usage Report**\n🕒 {current_date}"
-    send_mattermost_notification(message, output_image_file)
+    return output_image_file
 
-    plt.show()
+def main():
+    output_image_file = render_report()
+    if output_image_file:
+        current_date = datetime.now().strftime("%Y-%m-%d_%H-%M")
+        message = f"📊 **Server Resource Usage Report**\n🕒 {current_date}"
+        send_mattermost_notification(message, output_image_file)
 
-else:
-    print("No data retrieved from the database.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine.url import URL
+from sqlalchemy.exc import SQLAlchemyError
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.stream_read import read_batches
+from common.alerts import AlertEngine
+
+# Load environment variables
+load_dotenv()
+
+# Database credentials
+DB_CONFIG = {
+    'username': os.getenv('DB_USERNAME'),
+    'password': os.getenv('DB_PASSWORD'),
+    'host': os.getenv('DB_HOST'),
+    'port': int(os.getenv('DB_PORT', 5432)),
+    'database': os.getenv('DB_NAME')
+}
+
+SERVER_TABLE = os.getenv('DB_TABLE_NAME', 'server_metrics')
+HDFS_TABLE = 'hdfs_usage'
+STATE_TABLE = 'disk_forecast_state'
+FORECAST_TABLE = 'disk_forecast'
+
+# Samples lose half of their weight every FORECAST_HALF_LIFE_DAYS, which makes the
+# regression a sliding window that follows the recent growth rate.
+HALF_LIFE_DAYS = float(os.getenv('FORECAST_HALF_LIFE_DAYS', 30))
+# How far back a cold start (no saved state) reads the history.
+HISTORY_DAYS = int(os.getenv('FORECAST_HISTORY_DAYS', 365))
+# Huber tuning constant and number of reweighting passes per batch.
+HUBER_K = 1.345
+ROBUST_ITERATIONS = 3
+# Forecasts further out than this are reported as "not filling up".
+MAX_FORECAST_DAYS = int(os.getenv('FORECAST_MAX_DAYS', 3650))
+
+# Time is measured in days since EPOCH to keep the regression sums well conditioned.
+EPOCH = pd.Timestamp('2020-01-01')
+SUM_COLUMNS = ['w', 'st', 'sy', 'stt', 'sty', 'abs_resid']
+
+
+def create_db_connection():
+    """Create a PostgreSQL connection using SQLAlchemy."""
+    try:
+        connection_uri = URL.create(
+            drivername='postgresql+psycopg2',
+            username=DB_CONFIG['username'],
+            password=DB_CONFIG['password'],
+            host=DB_CONFIG['host'],
+            port=DB_CONFIG['port'],
+            database=DB_CONFIG['database']
+        )
+        engine = create_engine(connection_uri)
+        print("✅ Database connection established.")
+        return engine
+    except SQLAlchemyError as e:
+        print(f"❌ Database connection failed: {e}")
+        return None
+
+
+def to_days(timestamps):
+    """Convert timestamps to float days since EPOCH."""
+    return (pd.to_datetime(timestamps) - EPOCH) / pd.Timedelta(days=1)
+
+
+def empty_state():
+    """Return an empty per-target state frame."""
+    columns = ['target', 'kind', 't_ref', 'last_value'] + SUM_COLUMNS
+    return pd.DataFrame({c: pd.Series(dtype='object' if c in ('target', 'kind') else 'float64') for c in columns})
+
+
+def load_state(engine):
+    """Load the saved regression sums, or an empty state on the first run."""
+    if not inspect(engine).has_table(STATE_TABLE):
+        return empty_state()
+    with engine.connect() as conn:
+        return pd.read_sql(f"SELECT * FROM {STATE_TABLE}", con=conn)
+
+
+def watermarks(state):
+    """Per-target time of the newest sample already folded into the state."""
+    return dict(zip(state['target'], (EPOCH + pd.to_timedelta(state['t_ref'], unit='D')).dt.to_pydatetime()))
+
+
+def iter_samples(engine, marks, default_since):
+    """
+    Stream disk samples of every server and of HDFS as (target, kind, t, percent) batches.
+
+    Each target is read from its own watermark in `marks` (targets without one from
+    `default_since`), so a server that stopped reporting does not drag every other
+    target's history back over the network. Batches come in time order so each one
+    can be folded into the state as it arrives.
+    """
+    server_query = text(f"""
+    SELECT m.server_name AS target, 'server' AS kind, m.datetime_record, m.used_disk_percent AS percent
+    FROM {SERVER_TABLE} m
+    LEFT JOIN unnest(CAST(:targets AS text[]), CAST(:marks AS timestamp[])) AS w(target, since)
+           ON w.target = m.server_name
+    WHERE m.datetime_record > COALESCE(w.since, :since)
+      AND m.used_disk_percent IS NOT NULL
+      -- Rows of unreachable hosts (written with a 0% placeholder before the collector kept NaN)
+      AND m.total_disk_gb IS NOT NULL AND m.used_disk_gb IS NOT NULL
+    ORDER BY m.datetime_record
+    """)
+    hdfs_query = text(f"""
+    SELECT 'HDFS' AS target, 'hdfs' AS kind, datetime_record,
+           100.0 * dfs_used_tb / NULLIF(dfs_used_tb + dfs_remaining_tb, 0) AS percent
+    FROM {HDFS_TABLE}
+    WHERE datetime_record > :since
+    ORDER BY datetime_record
+    """)
+
+    server_marks = {target: since for target, since in marks.items() if target != 'HDFS'}
+    server_params = {'targets': list(server_marks), 'marks': list(server_marks.values()), 'since': default_since}
+    hdfs_params = {'since': marks.get('HDFS', default_since)}
+
+    with engine.connect() as conn:
+        queries = [(server_query, server_params)]
+        if inspect(conn).has_table(HDFS_TABLE):
+            queries.append((hdfs_query, hdfs_params))
+
+        for query, params in queries:
+            for df in read_batches(conn, query, params):
+                df = df.dropna(subset=['percent'])
+                if df.empty:
+                    continue
+                df['t'] = to_days(df.pop('datetime_record'))
+                yield df
+
+
+def solve(w, st, sy, stt, sty):
+    """Weighted least squares slope/intercept for every target from its sufficient statistics."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_t = st / w
+        mean_y = sy / w
+        var_t = stt / w - mean_t ** 2
+        slope = np.where(var_t > 1e-9, (sty / w - mean_t * mean_y) / var_t, 0.0)
+        intercept = mean_y - slope * mean_t
+    return np.nan_to_num(slope), intercept
+
+
+def accumulate(state, samples):
+    """
+    Fold new samples into the decayed regression sums of every target in one vectorized pass.
+
+    Each target keeps exponentially decayed sums of w, w*t, w*y, w*t^2 and w*t*y, so adding a
+    batch only costs O(batch) regardless of how much history is already folded in. Outliers
+    (e.g. a temporary dump that gets cleaned up) are down-weighted with Huber IRLS against the
+    current fit.
+    """
+    targets = pd.Index(state['target']).append(pd.Index(samples['target'])).unique()
+    state = state.set_index('target').reindex(targets)
+    state['kind'] = state['kind'].fillna(samples.groupby('target')['kind'].first())
+    n = len(targets)
+
+    codes = targets.get_indexer(samples['target'])
+    t = samples['t'].to_numpy(dtype=float)
+    y = samples['percent'].to_numpy(dtype=float)
+
+    # Skip samples older than what a target has already folded in (re-fetched rows).
+    old_ref = state['t_ref'].to_numpy(dtype=float)
+    fresh = ~(t <= old_ref[codes])
+    codes, t, y = codes[fresh], t[fresh], y[fresh]
+
+    t_ref = np.where(np.isnan(old_ref), -np.inf, old_ref)
+    np.maximum.at(t_ref, codes, t)
+    has_data = np.isfinite(t_ref)
+    t_ref = np.where(has_data, t_ref, np.nan)
+
+    lam = np.log(2) / HALF_LIFE_DAYS
+    old_decay = np.where(np.isnan(old_ref), 0.0, np.exp(-lam * (t_ref - old_ref)))
+    old = {c: np.nan_to_num(state[c].to_numpy(dtype=float)) * old_decay for c in SUM_COLUMNS}
+    decay = np.exp(-lam * (t_ref[codes] - t))
+
+    robust = np.ones_like(t)
+    for _ in range(ROBUST_ITERATIONS):
+        w = decay * robust
+        sums = {
+            'w': old['w'] + np.bincount(codes, w, n),
+            'st': old['st'] + np.bincount(codes, w * t, n),
+            'sy': old['sy'] + np.bincount(codes, w * y, n),
+            'stt': old['stt'] + np.bincount(codes, w * t * t, n),
+            'sty': old['sty'] + np.bincount(codes, w * t * y, n),
+        }
+        slope, intercept = solve(**sums)
+        resid = np.abs(y - (intercept[codes] + slope[codes] * t))
+        abs_resid = old['abs_resid'] + np.bincount(codes, decay * resid, n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Mean absolute deviation scaled to a normal sigma.
+            sigma = 1.2533 * abs_resid / (old['w'] + np.bincount(codes, decay, n))
+            robust = np.where(resid > HUBER_K * sigma[codes], HUBER_K * sigma[codes] / resid, 1.0)
+    sums['abs_resid'] = abs_resid
+
+    last_value = state['last_value'].to_numpy(dtype=float, copy=True)
+    order = np.argsort(t, kind='stable')
+    last_value[codes[order]] = y[order]
+
+    new_state = pd.DataFrame(sums, index=targets)
+    new_state['kind'] = state['kind']
+    new_state['t_ref'] = t_ref
+    new_state['last_value'] = last_value
+    return new_state[has_data].rename_axis('target').reset_index()
+
+
+def forecast(state, now):
+    """Compute the current fitted usage, growth rate and days until 100% for every target."""
+    slope, intercept = solve(*(state[c].to_numpy(dtype=float) for c in ['w', 'st', 'sy', 'stt', 'sty']))
+    t_now = to_days(now)
+    fitted = intercept + slope * t_now
+    with np.errstate(invalid='ignore', divide='ignore'):
+        days_until_full = np.where(slope > 0, np.clip((100.0 - fitted) / slope, 0, None), np.nan)
+    days_until_full[days_until_full > MAX_FORECAST_DAYS] = np.nan
+
+    result = pd.DataFrame({
+        'target': state['target'],
+        'kind': state['kind'],
+        'used_percent': state['last_value'].round(2),
+        'fitted_percent': np.round(fitted, 2),
+        'growth_percent_per_day': np.round(slope, 4),
+        'days_until_full': np.round(days_until_full, 1),
+    })
+    result['full_date'] = now.normalize() + pd.to_timedelta(result['days_until_full'], unit='D')
+    result['datetime_record'] = now
+    return result.sort_values('days_until_full', na_position='last').reset_index(drop=True)
+
+
+def main():
+    engine = create_db_connection()
+    if not engine:
+        return
+
+    now = pd.Timestamp.now()
+    state = load_state(engine)
+
+    # Targets silent for longer than the history window (decommissioned or long
+    # unreachable) are forgotten; if one comes back it starts cold like a new target.
+    history_start = now - pd.Timedelta(days=HISTORY_DAYS)
+    stale = state['t_ref'] < to_days(history_start)
+    if stale.any():
+        print(f"Dropping stale targets: {', '.join(state.loc[stale, 'target'])}")
+        state = state[~stale].reset_index(drop=True)
+
+    # Only rows newer than each target's own watermark have to cross the network.
+    fetched = 0
+    for samples in iter_samples(engine, watermarks(state), history_start.to_pydatetime()):
+        state = accumulate(state, samples)
+        fetched += len(samples)
+    print(f"Fetched {fetched} new samples")
+    if state.empty:
+        print("No disk history available to forecast.")
+        return
+
+    result = forecast(state, now)
+    print(result)
+
+    alerts = AlertEngine('disk_forecast')
+    # No growth means the disk never fills, which also resolves a firing alert
+    alerts.evaluate_frame(result.fillna({'days_until_full': np.inf}), 'target', 'datetime_record')
+    alerts.flush()
+
+    try:
+        with engine.begin() as conn:
+            state.to_sql(STATE_TABLE, conn, if_exists='replace', index=False)
+            result.to_sql(FORECAST_TABLE, conn, if_exists='append', index=False)
+        print("✅ Disk forecast stored in the database.")
+    except SQLAlchemyError as e:
+        print(f"❌ Failed to store disk forecast: {e}")
+
+
+if __name__ == "__main__":
+    main()
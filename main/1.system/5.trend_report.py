@@ -0,0 +1,153 @@
+import os
+import re
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from sqlalchemy import create_engine, text
+from urllib.parse import quote_plus
+from dotenv import load_dotenv
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.image_output import save_figure
+from common.inventory import SERVER_GROUPS
+
+# Load environment variables
+load_dotenv()
+
+# Column title -> inventory server-name pattern
+REPORT_GROUPS = {
+    "BI to Repo": SERVER_GROUPS["talend"],
+    "Datanode to Backup": SERVER_GROUPS["hadoop"],
+}
+
+METRICS = {
+    "cpu_usage_percent": "CPU (%)",
+    "used_ram_percent": "RAM (%)",
+    "used_disk_percent": "Disk (%)",
+}
+
+# SQL returns this many buckets per point kept by LTTB, so peaks survive the reduction
+OVERSAMPLE = 4
+
+RESULT_DIR = "/home/user/airflow/maintain/maintain_refactor/result/server_trend"
+os.makedirs(RESULT_DIR, exist_ok=True)
+
+# Database Connection
+db_config = {
+    'user': os.getenv('DB_USERNAME'),
+    'password': os.getenv('DB_PASSWORD'),
+    'host': os.getenv('DB_HOST'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'dbname': os.getenv('DB_NAME')
+}
+
+encoded_password = quote_plus(db_config['password'])
+connection_uri = f"postgresql+psycopg2://{db_config['user']}:{encoded_password}@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
+engine = create_engine(connection_uri)
+
+def fetch_bucketed_metrics(days, points):
+    """Fetch per-server metrics averaged into fixed time buckets so row count depends on points, not samples."""
+    bucket_seconds = max(60, int(days * 86400 / (points * OVERSAMPLE)))
+    averages = ",\n           ".join(f"AVG({col}) AS {col}" for col in METRICS)
+    query = text(f"""
+    SELECT server_name,
+           to_timestamp(floor(extract(epoch FROM datetime_record) / :bucket) * :bucket) AT TIME ZONE 'UTC' AS ts_bucket,
+           {averages}
+    FROM server_metrics
+    WHERE datetime_record >= NOW() - make_interval(days => :days)
+    GROUP BY server_name, ts_bucket
+    ORDER BY server_name, ts_bucket;
+    """)
+
+    try:
+        with engine.connect() as connection:
+            return pd.read_sql(query, con=connection, params={'bucket': bucket_seconds, 'days': days})
+    except Exception as e:
+        print(f"Database connection error: {e}")
+        return None
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; returns the indices of the points to keep."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:max(next_end, next_start + 1)].mean()
+        avg_y = y[next_start:max(next_end, next_start + 1)].mean()
+
+        # Pick the point forming the largest triangle with the previous pick and the next bucket average
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def downsample(df, points):
+    """Reduce every (server, metric) series to at most `points` points."""
+    series = {}
+    for server, server_df in df.groupby("server_name", sort=False):
+        x = server_df["ts_bucket"].astype("int64").to_numpy(dtype=float)
+        for col in METRICS:
+            y = server_df[col].to_numpy(dtype=float)
+            valid = ~np.isnan(y)
+            idx = lttb(x[valid], y[valid], points)
+            series[(server, col)] = (server_df["ts_bucket"].to_numpy()[valid][idx], y[valid][idx])
+    return series
+
+def plot_trends(series, days):
+    """One row per metric, one column per server group."""
+    fig, axs = plt.subplots(len(METRICS), len(REPORT_GROUPS), figsize=(16, 10), sharex=True, squeeze=False)
+
+    for col_idx, (group, pattern) in enumerate(REPORT_GROUPS.items()):
+        for row_idx, (metric, label) in enumerate(METRICS.items()):
+            ax = axs[row_idx][col_idx]
+            for (server, col), (x, y) in series.items():
+                if col == metric and re.search(pattern, server):
+                    ax.plot(x, y, linewidth=1, label=server)
+
+            ax.axhline(70, color="orange", linestyle="--", linewidth=0.8)
+            ax.axhline(80, color="red", linestyle="--", linewidth=0.8)
+            ax.set_ylim(0, 100)
+            ax.set_ylabel(label)
+            ax.grid(alpha=0.3)
+            if row_idx == 0:
+                ax.set_title(f"{group} ({days} days)", fontsize=12, fontweight='bold')
+                ax.legend(fontsize=7, loc="upper left", ncol=2)
+
+    fig.autofmt_xdate()
+    plt.tight_layout()
+    return fig
+
+def main():
+    parser = argparse.ArgumentParser(description="Server CPU/RAM/Disk trend report")
+    parser.add_argument("--days", type=int, default=int(os.getenv("TREND_DAYS", 30)), help="window length in days")
+    parser.add_argument("--points", type=int, default=int(os.getenv("TREND_POINTS", 300)), help="points per series")
+    args = parser.parse_args()
+
+    df = fetch_bucketed_metrics(args.days, args.points)
+    if df is None or df.empty:
+        print("No data retrieved from the database.")
+        return
+
+    df["ts_bucket"] = pd.to_datetime(df["ts_bucket"])
+    print(f"Fetched {len(df)} bucketed rows for {df['server_name'].nunique()} servers")
+
+    fig = plot_trends(downsample(df, args.points), args.days)
+
+    current_date = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    output_image_file = os.path.join(RESULT_DIR, f'server_trend_{args.days}d_{current_date}.png')
+    output_image_file = save_figure(fig, output_image_file)
+    print("✅ Plot saved:", output_image_file)
+
+if __name__ == "__main__":
+    main()
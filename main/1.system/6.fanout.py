@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import codecs
+import shlex
+import math
+import argparse
+import threading
+import paramiko
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.inventory import SERVER_GROUPS, select_servers
+
+# Hosts worked on at once; the default covers the whole inventory so a run takes as long as the slowest host
+FANOUT_CONCURRENCY = int(os.getenv('FANOUT_CONCURRENCY', 12))
+# Per-host limit for the command, connection included
+FANOUT_TIMEOUT = float(os.getenv('FANOUT_TIMEOUT', 300))
+CONNECT_TIMEOUT = 10
+# The command runs under coreutils `timeout` on the host, so it is killed there when the deadline
+# passes; it gets KILL_AFTER seconds after SIGTERM before SIGKILL, and the channel is abandoned
+# locally only if the host has still not reported an exit status after a further grace period.
+KILL_AFTER = 5
+LOCAL_GRACE = 10
+# Exit status of `timeout` when it had to stop the command (124) or kill it (137);
+# counted as a timeout only when the command also ran until the deadline
+REMOTE_TIMEOUT_CODES = (124, 137)
+
+READ_SIZE = 32768
+POLL_INTERVAL = 0.05
+
+# Lines from different hosts are printed whole, never interleaved mid-line
+print_lock = threading.Lock()
+
+def emit(prefix, line):
+    with print_lock:
+        print(f"{prefix} {line}", flush=True)
+
+class LineStream:
+    """Turns the byte chunks of one channel stream into prefixed output lines; only a partial line is buffered."""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.partial = ''
+
+    def feed(self, data):
+        text = self.partial + self.decoder.decode(data)
+        *lines, self.partial = text.split('\n')
+        for line in lines:
+            emit(self.prefix, line.rstrip('\r'))
+
+    def close(self):
+        text = self.partial + self.decoder.decode(b'', final=True)
+        if text:
+            emit(self.prefix, text.rstrip('\r'))
+        self.partial = ''
+
+def remote_command(command, seconds):
+    """Wrap the command so the remote host enforces the deadline itself."""
+    return f"timeout -k {KILL_AFTER} {seconds} sh -c {shlex.quote(command)}"
+
+def run_on_host(server, command, timeout):
+    """Run the command on one host, streaming its output as it arrives, and return its summary row."""
+    name = server['name']
+    started = time.monotonic()
+    deadline = started + timeout
+    result = {'host': name, 'ip': server['ip'], 'status': 'ok', 'exit_code': None, 'bytes': 0}
+
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    try:
+        # Connecting spends from the same per-host deadline as the command
+        connect_timeout = min(CONNECT_TIMEOUT, timeout)
+        client.connect(server['ip'], username=os.getenv(server['username_env']),
+                       password=os.getenv(server['password_env']),
+                       timeout=connect_timeout, banner_timeout=connect_timeout, auth_timeout=connect_timeout)
+
+        remaining = math.ceil(deadline - time.monotonic())
+        if remaining <= 0:
+            raise TimeoutError(f"connecting used up the {timeout:g}s timeout")
+
+        channel = client.get_transport().open_session()
+        channel.exec_command(remote_command(command, remaining))
+        command_started = time.monotonic()
+        hard_deadline = deadline + KILL_AFTER + LOCAL_GRACE
+        stdout, stderr = LineStream(f"[{name}]"), LineStream(f"[{name}!]")
+
+        while True:
+            idle = True
+            if channel.recv_ready():
+                data = channel.recv(READ_SIZE)
+                result['bytes'] += len(data)
+                stdout.feed(data)
+                idle = False
+            if channel.recv_stderr_ready():
+                data = channel.recv_stderr(READ_SIZE)
+                result['bytes'] += len(data)
+                stderr.feed(data)
+                idle = False
+            if idle and channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            if time.monotonic() > hard_deadline:
+                result['status'] = 'timeout'
+                break
+            if idle:
+                time.sleep(POLL_INTERVAL)
+
+        stdout.close()
+        stderr.close()
+        if result['status'] == 'ok':
+            result['exit_code'] = channel.recv_exit_status()
+            # The command itself may exit 124/137; only an exit at the remote deadline is a timeout
+            timed_out = time.monotonic() - command_started >= remaining
+            if result['exit_code'] in REMOTE_TIMEOUT_CODES and timed_out:
+                result['status'] = 'timeout'
+                emit(f"[{name}!]", f"❌ timed out after {timeout:g}s, command stopped on the host")
+            elif result['exit_code'] != 0:
+                result['status'] = 'failed'
+        else:
+            emit(f"[{name}!]", f"❌ no exit status {KILL_AFTER + LOCAL_GRACE}s after the {timeout:g}s timeout, channel abandoned")
+        channel.close()
+
+    except TimeoutError as e:
+        result['status'] = 'timeout'
+        emit(f"[{name}!]", f"❌ {e}")
+    except paramiko.AuthenticationException:
+        result['status'] = 'auth failed'
+        emit(f"[{name}!]", "❌ Authentication failed. Check SSH credentials.")
+    except Exception as e:
+        result['status'] = 'error'
+        emit(f"[{name}!]", f"❌ {e}")
+    finally:
+        client.close()
+
+    result['seconds'] = round(time.monotonic() - started, 1)
+    return result
+
+def fan_out(servers, command, concurrency=FANOUT_CONCURRENCY, timeout=FANOUT_TIMEOUT):
+    """Run the command on every server with at most `concurrency` hosts in flight; results keep inventory order."""
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(servers)))) as executor:
+        futures = [executor.submit(run_on_host, server, command, timeout) for server in servers]
+        return [future.result() for future in futures]
+
+def print_summary(results, elapsed):
+    """Print one line per host with its status, exit code and duration."""
+    width = max(len(r['host']) for r in results)
+    print(f"\n{'HOST':<{width}}  {'STATUS':<11}  {'EXIT':>4}  {'SECONDS':>7}  {'BYTES':>9}")
+    for r in results:
+        exit_code = '-' if r['exit_code'] is None else r['exit_code']
+        icon = '✅' if r['status'] == 'ok' else '❌'
+        print(f"{r['host']:<{width}}  {r['status']:<11}  {exit_code:>4}  {r['seconds']:>7}  {r['bytes']:>9,}  {icon}")
+
+    ok = sum(r['status'] == 'ok' for r in results)
+    print(f"\n{ok}/{len(results)} hosts succeeded in {elapsed:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a command on a group of servers in parallel")
+    parser.add_argument("command", help="shell command to run on every host")
+    parser.add_argument("--group", choices=sorted(SERVER_GROUPS) + ["all"], default="all", help="host group")
+    parser.add_argument("--hosts", help="comma separated server names or IPs, narrows the group")
+    parser.add_argument("--concurrency", type=int, default=FANOUT_CONCURRENCY, help="hosts worked on at once")
+    parser.add_argument("--timeout", type=float, default=FANOUT_TIMEOUT, help="per-host timeout in seconds")
+    args = parser.parse_args()
+
+    names = [h.strip() for h in args.hosts.split(",")] if args.hosts else None
+    servers = select_servers(args.group, names)
+    if not servers:
+        print("❌ No servers match the selection.")
+        sys.exit(2)
+
+    print(f"Running on {len(servers)} hosts (concurrency {args.concurrency}, timeout {args.timeout:g}s): {args.command}")
+    started = time.monotonic()
+    results = fan_out(servers, args.command, args.concurrency, args.timeout)
+    print_summary(results, time.monotonic() - started)
+
+    sys.exit(0 if all(r['status'] == 'ok' for r in results) else 1)
+
+if __name__ == "__main__":
+    main()
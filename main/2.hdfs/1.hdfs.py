@@ -1,12 +1,33 @@
 import paramiko
 import os
 import re
+import sys
+import pandas as pd
 import matplotlib.pyplot as plt
+from sqlalchemy import create_engine
+from sqlalchemy.engine.url import URL
+from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.alerts import AlertEngine
+from common.image_output import save_figure
+from common.dashboard_push import push_to_dashboard
+
+# Database credentials for storing the usage history
+DB_CONFIG = {
+    'username': os.getenv('DB_USERNAME'),
+    'password': os.getenv('DB_PASSWORD'),
+    'host': os.getenv('DB_HOST'),
+    'port': int(os.getenv('DB_PORT', 5432)),
+    'database': os.getenv('DB_NAME')
+}
+
+HDFS_USAGE_TABLE = 'hdfs_usage'
+
 def parse_hdfs_report(output):
     """Extract DFS Used and DFS Remaining from hdfs dfsadmin -report output."""
     dfs_used_bytes = dfs_remaining_bytes = None
@@ -91,24 +112,55 @@ def fetch_hdfs_usage():
     finally:
         client.close()
 
+def store_hdfs_usage(dfs_used_tb, dfs_remaining_tb):
+    """Append the current HDFS usage to the history table used for forecasting."""
+    try:
+        connection_uri = URL.create(
+            drivername='postgresql+psycopg2',
+            username=DB_CONFIG['username'],
+            password=DB_CONFIG['password'],
+            host=DB_CONFIG['host'],
+            port=DB_CONFIG['port'],
+            database=DB_CONFIG['database']
+        )
+        engine = create_engine(connection_uri)
+        df = pd.DataFrame([{
+            "dfs_used_tb": dfs_used_tb,
+            "dfs_remaining_tb": dfs_remaining_tb,
+            "datetime_record": pd.Timestamp.now()
+        }])
+        with engine.begin() as conn:
+            df.to_sql(HDFS_USAGE_TABLE, conn, if_exists='append', index=False)
+        print("✅ HDFS usage stored in the database.")
+        push_to_dashboard('hdfs_usage', df)
+    except SQLAlchemyError as e:
+        print(f"❌ Failed to store HDFS usage: {e}")
+
 def plot_pie_chart(dfs_used_tb, dfs_remaining_tb):
     """Generate and display a pie chart for HDFS usage."""
     labels = ['DFS Used', 'DFS Remaining']
     sizes = [dfs_used_tb, dfs_remaining_tb]
     colors = ['red', 'green']
     
-    plt.figure(figsize=(6, 6))
+    fig = plt.figure(figsize=(6, 6))
     plt.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', 
             startangle=140, wedgeprops={'edgecolor': 'black'})
     plt.title("HDFS Storage Usage (TB)")
     plt.axis('equal')
 
     # Save the plot
-    chart_path = "hdfs_usage_piechart.png"
-    plt.savefig(chart_path)
+    chart_path = save_figure(fig, "hdfs_usage_piechart.png")
+    plt.close(fig)
     print(f"✅ Pie chart saved as {chart_path}")
 
 if __name__ == "__main__":
     result = fetch_hdfs_usage()
     if result:
+        dfs_used_tb, dfs_remaining_tb = result
+        alerts = AlertEngine('hdfs_usage')
+        alerts.evaluate('HDFS', {'remaining_percent': 100 * dfs_remaining_tb / (dfs_used_tb + dfs_remaining_tb)},
+                        pd.Timestamp.now())
+        alerts.flush()
+
+        store_hdfs_usage(*result)
         plot_pie_chart(*result)
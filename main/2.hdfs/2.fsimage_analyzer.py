@@ -0,0 +1,263 @@
+import paramiko
+import os
+import csv
+import gzip
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine.url import URL
+from sqlalchemy.exc import SQLAlchemyError
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Database credentials for storing the per-directory usage history
+DB_CONFIG = {
+    'username': os.getenv('DB_USERNAME'),
+    'password': os.getenv('DB_PASSWORD'),
+    'host': os.getenv('DB_HOST'),
+    'port': int(os.getenv('DB_PORT', 5432)),
+    'database': os.getenv('DB_NAME')
+}
+
+DIR_USAGE_TABLE = 'hdfs_dir_usage'
+
+# Directory prefixes are aggregated down to this many levels below /
+FSIMAGE_DEPTH = int(os.getenv('FSIMAGE_DEPTH', 3))
+# Files below this size count as small files
+SMALL_FILE_BYTES = int(os.getenv('FSIMAGE_SMALL_FILE_BYTES', 1024 ** 2))
+# Rows parsed per chunk; memory use depends on this and the number of prefixes, not on the image size
+CHUNK_ROWS = int(os.getenv('FSIMAGE_CHUNK_ROWS', 200000))
+# Scratch directory on the remote host for the fetched image and the oiv temp store
+FSIMAGE_WORK_DIR = os.getenv('FSIMAGE_WORK_DIR', '/tmp/fsimage_analyzer')
+
+COUNTERS = ['bytes', 'raw_bytes', 'files', 'small_files']
+
+def remote_oiv_command(work_dir):
+    """
+    Fetch the latest fsimage and dump it as tab-delimited text on stdout.
+
+    stderr goes to a log file on the remote host so a chatty oiv can never block
+    the channel, and the image is removed once it has been streamed.
+    """
+    return (
+        f"rm -rf {work_dir} && mkdir -p {work_dir} && "
+        f"hdfs dfsadmin -fetchImage {work_dir} > {work_dir}/oiv.log 2>&1 && "
+        f"hdfs oiv -p Delimited -t {work_dir}/oiv_tmp "
+        f"-i \"$(ls -t {work_dir}/fsimage_* | head -n 1)\" 2>> {work_dir}/oiv.log; "
+        f"rc=$?; rm -rf {work_dir}/fsimage_* {work_dir}/oiv_tmp; exit $rc"
+    )
+
+def aggregate_chunk(chunk, depth, small_file_bytes):
+    """Sum bytes, raw bytes, file and small-file counts of one chunk per directory prefix."""
+    files = chunk[~chunk['Permission'].str.startswith('d', na=False)]
+    if files.empty:
+        return None
+
+    size = files['FileSize'].to_numpy(dtype=np.int64)
+    values = pd.DataFrame({
+        'bytes': size,
+        'raw_bytes': size * files['Replication'].to_numpy(dtype=np.int64),
+        'files': 1,
+        'small_files': (size < small_file_bytes).astype(np.int64),
+    })
+
+    # A file in /a/b/c.txt belongs to "/", "/a" and "/a/b"
+    paths = files['Path'].reset_index(drop=True)
+    parts = paths.str.split('/', n=depth + 1, expand=True)
+    dir_levels = paths.str.count('/').to_numpy() - 1
+
+    frames = [values.sum().to_frame().T.assign(path='/', depth=0)]
+    prefix = pd.Series('', index=paths.index)
+    for level in range(1, depth + 1):
+        if level >= parts.shape[1]:
+            break
+        mask = dir_levels >= level
+        if not mask.any():
+            break
+        prefix = prefix + '/' + parts[level].fillna('')
+        grouped = values[mask].groupby(prefix[mask].to_numpy()).sum()
+        frames.append(grouped.rename_axis('path').reset_index().assign(depth=level))
+
+    return pd.concat(frames, ignore_index=True)
+
+def analyze_stream(stream, depth=FSIMAGE_DEPTH, small_file_bytes=SMALL_FILE_BYTES, chunk_rows=CHUNK_ROWS):
+    """
+    Aggregate an `hdfs oiv -p Delimited` dump in a single pass.
+
+    Only one chunk of rows and the running per-prefix totals are held in memory,
+    so multi-GB dumps can be read straight off the SSH channel.
+    """
+    reader = pd.read_csv(
+        stream, sep='\t', usecols=['Path', 'Replication', 'FileSize', 'Permission'],
+        dtype={'Path': str, 'Permission': str, 'Replication': np.int64, 'FileSize': np.int64},
+        quoting=csv.QUOTE_NONE, keep_default_na=False, chunksize=chunk_rows
+    )
+
+    totals = None
+    rows = 0
+    for chunk in reader:
+        rows += len(chunk)
+        partial = aggregate_chunk(chunk, depth, small_file_bytes)
+        if partial is None:
+            continue
+        partial = partial.groupby(['path', 'depth'])[COUNTERS].sum()
+        totals = partial if totals is None else totals.add(partial, fill_value=0)
+        print(f"Processed {rows:,} inodes, {len(totals):,} prefixes")
+
+    if totals is None:
+        return pd.DataFrame(columns=['path', 'depth'] + COUNTERS)
+    return totals.astype(np.int64).reset_index()
+
+def stream_remote_fsimage(depth, small_file_bytes):
+    """Connect via SSH, authenticate with Kerberos if required, and analyze the latest fsimage."""
+
+    # Load from .env
+    SERVER_IP = os.getenv("SERVER_IP")
+    USERNAME = os.getenv("USERNAME")
+    PASSWORD = os.getenv("PASSWORD")
+    KEYTAB_PATH = os.getenv("KEYTAB_PATH")
+    PRINCIPAL = os.getenv("PRINCIPAL")
+
+    if not SERVER_IP or not USERNAME:
+        raise ValueError("Missing SERVER_IP or USERNAME in .env file.")
+
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+    try:
+        # SSH Connection
+        if PASSWORD:
+            client.connect(SERVER_IP, username=USERNAME, password=PASSWORD)
+        else:
+            client.connect(SERVER_IP, username=USERNAME)
+
+        command = remote_oiv_command(FSIMAGE_WORK_DIR)
+        # Authenticate with Kerberos if a keytab is provided
+        if KEYTAB_PATH and PRINCIPAL:
+            command = f'kinit -kt {KEYTAB_PATH} {PRINCIPAL} && {command}'
+
+        stdin, stdout, stderr = client.exec_command(command)
+        usage = analyze_stream(stdout, depth, small_file_bytes)
+
+        # A failed fetch or oiv leaves a truncated dump, which must not be stored as a snapshot
+        exit_status = stdout.channel.recv_exit_status()
+        if exit_status != 0:
+            print(f"❌ fsimage dump failed with exit code {exit_status}, see {FSIMAGE_WORK_DIR}/oiv.log on {SERVER_IP}")
+            return None
+
+        return usage
+
+    except paramiko.AuthenticationException:
+        print("❌ Authentication failed. Check Kerberos or SSH credentials.")
+    except paramiko.SSHException as e:
+        print(f"❌ SSH error: {e}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+    finally:
+        client.close()
+
+def analyze_local_file(path, depth, small_file_bytes):
+    """Analyze a delimited dump that is already on this host (gzip is read transparently)."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as stream:
+        return analyze_stream(stream, depth, small_file_bytes)
+
+def create_db_connection():
+    """Create a PostgreSQL connection using SQLAlchemy."""
+    try:
+        connection_uri = URL.create(
+            drivername='postgresql+psycopg2',
+            username=DB_CONFIG['username'],
+            password=DB_CONFIG['password'],
+            host=DB_CONFIG['host'],
+            port=DB_CONFIG['port'],
+            database=DB_CONFIG['database']
+        )
+        engine = create_engine(connection_uri)
+        print("✅ Database connection established.")
+        return engine
+    except SQLAlchemyError as e:
+        print(f"❌ Database connection failed: {e}")
+        return None
+
+def compute_deltas(usage, previous):
+    """
+    Add *_delta columns against the previous snapshot.
+
+    Prefixes that disappeared since then are kept with zero totals, so a deleted
+    directory shows up as a negative delta instead of silently vanishing.
+    """
+    merged = usage.merge(previous, on=['path', 'depth'], how='outer', suffixes=('', '_prev'))
+    for column in COUNTERS:
+        merged[column] = merged[column].fillna(0).astype(np.int64)
+        merged[f'{column}_delta'] = merged[column] - merged[f'{column}_prev'].fillna(0).astype(np.int64)
+    return merged.drop(columns=[f'{column}_prev' for column in COUNTERS])
+
+def store_dir_usage(engine, usage, snapshot_date):
+    """Replace today's snapshot in hdfs_dir_usage, with deltas against the latest earlier snapshot."""
+    previous = pd.DataFrame(columns=['path', 'depth'] + COUNTERS)
+    try:
+        with engine.begin() as conn:
+            if inspect(conn).has_table(DIR_USAGE_TABLE):
+                previous = pd.read_sql(text(f"""
+                    SELECT path, depth, {', '.join(COUNTERS)}
+                    FROM {DIR_USAGE_TABLE}
+                    WHERE snapshot_date = (SELECT MAX(snapshot_date) FROM {DIR_USAGE_TABLE} WHERE snapshot_date < :today)
+                """), conn, params={'today': snapshot_date})
+                conn.execute(text(f"DELETE FROM {DIR_USAGE_TABLE} WHERE snapshot_date = :today"),
+                             {'today': snapshot_date})
+
+            result = compute_deltas(usage, previous).assign(snapshot_date=snapshot_date)
+            result.to_sql(DIR_USAGE_TABLE, conn, if_exists='append', index=False, chunksize=10000)
+        print(f"✅ Stored {len(result):,} directory prefixes for {snapshot_date}.")
+        return result
+    except SQLAlchemyError as e:
+        print(f"❌ Failed to store directory usage: {e}")
+        return None
+
+def print_hotspots(usage, top):
+    """Print the biggest, fastest growing and most small-file heavy directories at the deepest level."""
+    deepest = usage[usage['depth'] == usage['depth'].max()]
+    tb = 1024 ** 4
+
+    print(f"\nTotal: {usage.loc[usage['depth'] == 0, 'bytes'].sum() / tb:.2f} TB in "
+          f"{usage.loc[usage['depth'] == 0, 'files'].sum():,} files")
+    print("\nLargest directories (TB):")
+    print(deepest.nlargest(top, 'bytes').assign(TB=lambda d: (d['bytes'] / tb).round(3))[['path', 'TB', 'files']].to_string(index=False))
+    if 'bytes_delta' in deepest:
+        print("\nFastest growing since the previous snapshot (TB):")
+        print(deepest.nlargest(top, 'bytes_delta').assign(TB_delta=lambda d: (d['bytes_delta'] / tb).round(3))[['path', 'TB_delta', 'files_delta']].to_string(index=False))
+    print("\nSmall-file hotspots:")
+    print(deepest.nlargest(top, 'small_files')[['path', 'small_files', 'files']].to_string(index=False))
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-directory HDFS usage from the latest fsimage")
+    parser.add_argument("--input", help="local hdfs oiv Delimited dump (optionally .gz) instead of fetching over SSH")
+    parser.add_argument("--depth", type=int, default=FSIMAGE_DEPTH, help="directory levels to aggregate")
+    parser.add_argument("--small-file-bytes", type=int, default=SMALL_FILE_BYTES, help="small-file size threshold")
+    parser.add_argument("--top", type=int, default=15, help="rows per hotspot listing")
+    parser.add_argument("--no-store", action="store_true", help="print the hotspots without writing a snapshot")
+    args = parser.parse_args()
+
+    if args.input:
+        usage = analyze_local_file(args.input, args.depth, args.small_file_bytes)
+    else:
+        usage = stream_remote_fsimage(args.depth, args.small_file_bytes)
+
+    if usage is None or usage.empty:
+        print("❌ No usage data collected.")
+        return
+
+    if not args.no_store:
+        engine = create_db_connection()
+        stored = store_dir_usage(engine, usage, pd.Timestamp.now().date()) if engine else None
+        if stored is not None:
+            usage = stored
+
+    print_hotspots(usage, args.top)
+
+if __name__ == "__main__":
+    main()
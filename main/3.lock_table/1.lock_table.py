@@ -1,13 +1,17 @@
 import os
-import pandas as pd
 import requests
-from sqlalchemy import create_engine
+import sys
+import mimetypes
+from sqlalchemy import create_engine, text
 from sqlalchemy.engine.url import URL
 import plotly.graph_objects as go
-import plotly.io as pio
 from dotenv import load_dotenv
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.stream_read import read_frame
+from common.image_output import save_plotly_figure
+
 # Load environment variables
 load_dotenv()
 
@@ -48,14 +52,14 @@ def create_db_connection(username, password, host, port, database):
 
 def fetch_lock_data(conn):
     """Retrieve locked tables from Hive Metastore."""
-    select_stm = """
+    select_stm = text("""
     SELECT hl_db, hl_table, hl_agent_info
     FROM hive_locks
     WHERE hl_table IS NOT NULL AND hl_agent_info != 'Unknown'
     GROUP BY hl_db, hl_table, hl_agent_info
     ORDER BY hl_table ASC, hl_agent_info ASC;
-    """
-    df = pd.read_sql_query(select_stm, conn)
+    """)
+    df = read_frame(conn, select_stm, categorical=['hl_db', 'hl_agent_info'])
     df.reset_index(inplace=True)
     df.rename(columns={'index': 'Index'}, inplace=True)
     return df
@@ -80,12 +84,12 @@ def create_table_figure(df):
     )
     return fig
 
-def save_figure(fig):
-    """Save the table figure as an image with a timestamped filename."""
+def save_figure(fig, n_rows=None):
+    """Save the table figure as an image with a timestamped filename; n_rows sets the resolution."""
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")  # Format: YYYY-MM-DD_HH-MM-SS
     image_path = os.path.join(RESULT_DIR, f"locktable_{timestamp}.png")
     
-    pio.write_image(fig, image_path)
+    image_path = save_plotly_figure(fig, image_path, n_rows=n_rows)
     print(f"✅ Image saved at {image_path}")
     
     return image_path  # Return the generated filename
@@ -103,7 +107,7 @@ def send_mattermost_notification(message, image_path, token, channel_id):
     file_url = 'https://chat.rtarf.mi.th/api/v4/files'
     
     with open(image_path, 'rb') as image_file:
-        files = {'files': (image_path, image_file, 'image/png')}
+        files = {'files': (os.path.basename(image_path), image_file, mimetypes.guess_type(image_path)[0])}
         file_data = {'channel_id': channel_id}
         
         file_response = requests.post(file_url, headers={'Authorization': f'Bearer {token}'}, files=files, data=file_data)
@@ -138,10 +142,11 @@ def send_mattermost_notification(message, image_path, token, channel_id):
     return response
 
 
-def main():
+def render_report():
+    """Render the lock table image and return its path, or None if the database is unreachable."""
     engine = create_db_connection(**DB_CONFIG)
     if not engine:
-        return
+        return None
 
     with engine.connect() as conn:
         df = fetch_lock_data(conn)
@@ -149,7 +154,12 @@ def main():
     print(f"Number of Lock Rows: {len(df)}\n", df)
 
     fig = create_table_figure(df)
-    image_path = save_figure(fig)  # Get the saved image path
+    return save_figure(fig, n_rows=len(df))  # Get the saved image path
+
+def main():
+    image_path = render_report()
+    if not image_path:
+        return
 
     MATTERMOST_CHANNEL_ID = "389wx7ehk38ajc46hex5ajndxe"
 
@@ -0,0 +1,152 @@
+import os
+import sys
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine.url import URL
+from sqlalchemy.exc import SQLAlchemyError
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.alerts import AlertEngine
+
+# Hive Metastore database (read only)
+HL_DB_CONFIG = {
+    'username': os.getenv('HL_TABLE_USER'),
+    'password': os.getenv('HL_TABLE_PASSWORD'),
+    'host': os.getenv('HL_TABLE_IP'),
+    'port': int(os.getenv('HL_TABLE_PORT', 5432)),
+    'database': os.getenv('HL_TABLE_DB')
+}
+
+# Monitoring database where the time series are stored
+DB_CONFIG = {
+    'username': os.getenv('DB_USERNAME'),
+    'password': os.getenv('DB_PASSWORD'),
+    'host': os.getenv('DB_HOST'),
+    'port': int(os.getenv('DB_PORT', 5432)),
+    'database': os.getenv('DB_NAME')
+}
+
+# Failed compactions are moved to completed_compactions; count the ones that ended within this window
+COMPACTION_FAILED_WINDOW_HOURS = float(os.getenv('METASTORE_COMPACTION_FAILED_WINDOW_HOURS', 24))
+
+# The probe is cancelled by the server after this long, so it can never pile onto a struggling metastore
+STATEMENT_TIMEOUT_MS = int(os.getenv('METASTORE_STATEMENT_TIMEOUT_MS', 5000))
+
+HEALTH_TABLE = 'metastore_health'
+LOCK_COUNTS_TABLE = 'metastore_lock_counts'
+
+# One round trip: every signal is a sub-select of a single statement, and the
+# lock breakdown comes back as JSON so the result is a single row.
+# Hive stores txn/compaction times as epoch milliseconds.
+HEALTH_QUERY = text("""
+WITH now_ms AS (
+    SELECT (extract(epoch FROM now()) * 1000)::bigint AS ms
+),
+locks AS (
+    SELECT hl_db, hl_agent_info, hl_lock_state, hl_acquired_at, hl_last_heartbeat
+    FROM hive_locks
+),
+lock_counts AS (
+    SELECT hl_db, hl_agent_info,
+           count(*) AS lock_count,
+           count(*) FILTER (WHERE hl_lock_state = 'w') AS waiting_count
+    FROM locks
+    GROUP BY hl_db, hl_agent_info
+)
+SELECT
+    (SELECT count(*) FROM locks) AS lock_total,
+    (SELECT count(*) FROM locks WHERE hl_lock_state = 'w') AS lock_waiting,
+    (SELECT count(*) FROM compaction_queue WHERE cq_state IN ('i', 'w')) AS compaction_queue_depth,
+    (SELECT count(*) FROM compaction_queue WHERE cq_state = 'r') AS compaction_ready_for_cleaning,
+    (SELECT count(*) FROM completed_compactions, now_ms
+       WHERE cc_state = 'f' AND cc_end >= now_ms.ms - :failed_window_ms) AS compaction_failed,
+    -- 0 rather than NULL when nothing is queued or open, so the age alerts can resolve
+    (SELECT coalesce((max(now_ms.ms - cq_start) / 1000)::bigint, 0)
+       FROM compaction_queue, now_ms WHERE cq_start IS NOT NULL) AS oldest_compaction_age_s,
+    (SELECT count(*) FROM txns WHERE txn_state = 'o') AS open_txns,
+    (SELECT count(*) FROM txns WHERE txn_state = 'a') AS aborted_txns,
+    (SELECT min(txn_id) FROM txns WHERE txn_state = 'o') AS oldest_open_txn_id,
+    (SELECT coalesce((max(now_ms.ms - txn_started) / 1000)::bigint, 0)
+       FROM txns, now_ms WHERE txn_state = 'o') AS oldest_open_txn_age_s,
+    (SELECT coalesce(json_agg(lock_counts), '[]'::json) FROM lock_counts) AS lock_counts
+""")
+
+
+def create_db_connection(config, **kwargs):
+    """Create a PostgreSQL connection using SQLAlchemy."""
+    try:
+        connection_uri = URL.create(
+            drivername='postgresql+psycopg2',
+            username=config['username'],
+            password=config['password'],
+            host=config['host'],
+            port=config['port'],
+            database=config['database']
+        )
+        engine = create_engine(connection_uri, **kwargs)
+        print("✅ Database connection established.")
+        return engine
+    except SQLAlchemyError as e:
+        print(f"❌ Database connection failed: {e}")
+        return None
+
+
+def fetch_metastore_health(engine):
+    """Collect all metastore health signals in one read-only query."""
+    with engine.connect() as conn:
+        row = conn.execute(HEALTH_QUERY, {'failed_window_ms': int(COMPACTION_FAILED_WINDOW_HOURS * 3600 * 1000)}).mappings().one()
+
+    health = dict(row)
+    lock_counts = pd.DataFrame(health.pop('lock_counts'),
+                               columns=['hl_db', 'hl_agent_info', 'lock_count', 'waiting_count'])
+    return health, lock_counts
+
+
+def store_metastore_health(engine, health, lock_counts):
+    """Append the snapshot to the health time series tables."""
+    now = pd.Timestamp.now()
+    health_df = pd.DataFrame([health]).assign(datetime_record=now)
+    lock_counts = lock_counts.assign(datetime_record=now)
+
+    try:
+        with engine.begin() as conn:
+            health_df.to_sql(HEALTH_TABLE, conn, if_exists='append', index=False)
+            if not lock_counts.empty:
+                lock_counts.to_sql(LOCK_COUNTS_TABLE, conn, if_exists='append', index=False)
+        print("✅ Metastore health stored in the database.")
+    except SQLAlchemyError as e:
+        print(f"❌ Failed to store metastore health: {e}")
+
+
+def main():
+    # statement_timeout and read-only are set as connection options, so they cost no extra round trip
+    metastore = create_db_connection(
+        HL_DB_CONFIG,
+        connect_args={'options': f'-c statement_timeout={STATEMENT_TIMEOUT_MS} -c default_transaction_read_only=on'}
+    )
+    monitor = create_db_connection(DB_CONFIG)
+    if not metastore or not monitor:
+        return
+
+    try:
+        health, lock_counts = fetch_metastore_health(metastore)
+    except SQLAlchemyError as e:
+        print(f"❌ Metastore health query failed or timed out: {e}")
+        return
+
+    print(pd.Series(health).to_string())
+    print(lock_counts.sort_values('lock_count', ascending=False).head(20).to_string(index=False))
+
+    alerts = AlertEngine('metastore_health')
+    alerts.evaluate('Hive Metastore', health, pd.Timestamp.now())
+    alerts.flush()
+
+    store_metastore_health(monitor, health, lock_counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import os
+import sys
 import requests
 import pandas as pd
-from sqlalchemy import create_engine, Table, Column, String, DateTime, MetaData
+from sqlalchemy import create_engine, inspect, text, Table, Column, String, DateTime, MetaData, Index
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.engine.url import URL
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
@@ -10,6 +12,10 @@ from requests.exceptions import ConnectionError, Timeout, RequestException
 # Load environment variables from .env file
 load_dotenv()
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.alerts import AlertEngine, HEALTH_LEVELS
+from common.dashboard_push import push_to_dashboard
+
 # Cloudera API credentials
 CLOUDERA_URL = 'https://10.104.4.19:7183/api/v31/clusters/RTARF_CDP/services'
 CLOUDERA_AUTH = (os.getenv('CLOUDERA_USER'), os.getenv('CLOUDERA_PASS'))
@@ -23,6 +29,14 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME')
 }
 
+# Rows are keyed by (service_name, bucket): a rerun or backfill inside the same
+# bucket updates the existing row instead of adding a duplicate. The collector runs
+# every few minutes, so the default keeps every scheduled run as its own row.
+WRITE_BUCKET = os.getenv('WRITE_BUCKET', 'minute')  # minute, hour or day
+BUCKET_FREQ = {'minute': 'min', 'hour': 'h', 'day': 'D'}
+KEY_COLUMNS = ['service_name', 'bucket']
+KEY_INDEX = 'cloudera_service_status_service_bucket_key'
+
 def create_db_connection():
     """Create a PostgreSQL connection using SQLAlchemy."""
     try:
@@ -49,7 +63,9 @@ def create_table_if_not_exists(engine):
         "cloudera_service_status", metadata,
         Column("service_name", String, nullable=False),
         Column("health_status", String, nullable=False),
-        Column("timestamp", DateTime, nullable=False)
+        Column("timestamp", DateTime, nullable=False),
+        Column("bucket", DateTime),
+        Index(KEY_INDEX, "service_name", "bucket", unique=True)
     )
 
     try:
@@ -58,6 +74,28 @@ def create_table_if_not_exists(engine):
     except SQLAlchemyError as e:
         print(f"❌ Error creating table: {e}")
 
+def has_upsert_key(engine):
+    """
+    Whether the table has the (service_name, bucket) unique key.
+
+    A table created before upserts existed is migrated once with
+    1.system/1.1.migrate_upsert_keys.py; until then rows are appended as before.
+    """
+    if any(ix['name'] == KEY_INDEX for ix in inspect(engine).get_indexes("cloudera_service_status")):
+        return True
+    print("❌ cloudera_service_status has no (service_name, bucket) key; run 1.system/1.1.migrate_upsert_keys.py. Appending instead.")
+    return False
+
+def upsert_on_conflict(pd_table, conn, keys, data_iter):
+    """pandas to_sql method: one INSERT ... ON CONFLICT (service_name, bucket) DO UPDATE per chunk."""
+    rows = [dict(zip(keys, row)) for row in data_iter]
+    stmt = insert(pd_table.table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={col: stmt.excluded[col] for col in keys if col not in KEY_COLUMNS}
+    )
+    return conn.execute(stmt).rowcount
+
 def fetch_service_status():
     """Fetch service status from Cloudera API."""
     try:
@@ -99,11 +137,19 @@ def store_service_status(engine, data):
     try:
         df = pd.DataFrame(data)
         df['timestamp'] = pd.Timestamp.utcnow()  # Add timestamp for tracking
+        df['bucket'] = df['timestamp'].dt.floor(BUCKET_FREQ[WRITE_BUCKET])
+        df = df.drop_duplicates(subset=KEY_COLUMNS, keep='last')
 
         with engine.begin() as conn:
-            df.to_sql('cloudera_service_status', conn, if_exists='append', index=False)
+            if has_upsert_key(engine):
+                df.to_sql('cloudera_service_status', conn, if_exists='append', index=False,
+                          chunksize=500, method=upsert_on_conflict)
+            else:
+                df.drop(columns='bucket').to_sql('cloudera_service_status', conn, if_exists='append', index=False,
+                                                 chunksize=500)
         
         print("✅ Data stored successfully in the database.")
+        push_to_dashboard('service_status', df)
     
     except SQLAlchemyError as e:
         print(f"❌ Failed to store data in the database: {e}")
@@ -117,6 +163,13 @@ def main():
     create_table_if_not_exists(engine)
     
     service_data = fetch_service_status()
+
+    alerts = AlertEngine('service_status')
+    now = pd.Timestamp.now()
+    for record in service_data:
+        alerts.evaluate(record['service_name'], {'health_level': HEALTH_LEVELS.get(record['health_status'])}, now)
+    alerts.flush()
+
     store_service_status(engine, service_data)
 
 if __name__ == "__main__":
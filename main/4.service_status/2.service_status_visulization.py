@@ -1,11 +1,17 @@
 from dotenv import load_dotenv 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 import requests
 from urllib.parse import quote_plus
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.report_cache import WatermarkCache
+from common.stream_read import latest_per_key
+from common.image_output import save_figure
+
 # Load environment variables
 load_dotenv()
 
@@ -25,76 +31,91 @@ encoded_password = quote_plus(DB_CONFIG['password'])
 connection_uri = f"postgresql+psycopg2://{DB_CONFIG['username']}:{encoded_password}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
 engine = create_engine(connection_uri)
 
-# Query data from the database
-query = """
-SELECT service_name, health_status, timestamp::date AS date
-FROM cloudera_service_status
-WHERE timestamp >= NOW() - INTERVAL '7 days'
-ORDER BY timestamp DESC;
-"""
-
-df = pd.read_sql_query(query, engine)
-
-df['date'] = df['date'].astype(str)
-
-# Pivot data: Service Names as rows, Dates as columns, Health Status as values
-pivot_df = df.pivot(index='service_name', columns='date', values='health_status').fillna("N/A")
-
-# Define status colors
-status_colors = {
-    "GOOD": "#4CAF50",
-    "CONCERNING": "#FF9800",
-    "BAD": "#F44336",
-    "N/A": "#BDBDBD"
-}
-
-# Get unique services and dates from the DataFrame
-services = pivot_df.index.tolist()
-dates = pivot_df.columns.tolist()
-
-# Create a Figure and Set Dynamic Size
-num_rows = len(services)
-num_cols = len(dates)
-fig, ax = plt.subplots(figsize=(max(8, num_cols * 1.2), max(5, num_rows * 0.6)))
-
-# Draw Colored Blocks
-for i in range(num_rows):
-    for j in range(num_cols):
-        value = pivot_df.iloc[i, j]
-        color = status_colors.get(value, "white")
-        ax.add_patch(plt.Rectangle((j, num_rows - i - 1), 1, 1, color=color, ec='black', lw=1))
-
-# Set Axis Labels
-ax.set_xticks([i + 0.5 for i in range(num_cols)])
-ax.set_xticklabels(dates, fontsize=12, rotation=45, ha='right')
-ax.set_yticks([i + 0.5 for i in range(num_rows)])
-ax.set_yticklabels(services, fontsize=12, fontweight="bold", ha='right')
-
-ax.set_xlim(0, num_cols)
-ax.set_ylim(0, num_rows)
-ax.tick_params(axis='x', bottom=False, top=True, labeltop=True, labelbottom=False)
-ax.tick_params(axis='y', left=False, right=True, labelright=False, labelleft=True)
-
-plt.title("Cloudera Service Health Status (Last 7 Days)", fontsize=14, fontweight="bold")
-
-# Legend
-legend_labels = ["GOOD", "CONCERNING", "BAD", "N/A"]
-legend_colors = [status_colors["GOOD"], status_colors["CONCERNING"], status_colors["BAD"], status_colors["N/A"]]
-ax.legend(
-    handles=[plt.Rectangle((0, 0), 1, 1, color=color) for color in legend_colors],
-    labels=legend_labels,
-    loc="upper right",
-    fontsize=12,
-    frameon=True
-)
-
-# Save Image with Timestamp
 RESULT_DIR = "/home/user/airflow/maintain/maintain_refactor/result/service_status"
 os.makedirs(RESULT_DIR, exist_ok=True)
-timestamp = pd.Timestamp.now().strftime("%Y-%m-%d_%H-%M-%S")
-image_path = f"{RESULT_DIR}/service_health_{timestamp}.png"
-plt.savefig(image_path, bbox_inches='tight', dpi=300)
-plt.show()
+
+# Local copy of the last 7 days; each run only pulls rows newer than the cached ones
+service_status_cache = WatermarkCache("cloudera_service_status", "timestamp", ["service_name", "bucket"], window_days=7)
+
+def render_report():
+    """Render the 7-day service health heatmap and return the image path."""
+    # Query new rows from the database into the local cache
+    query = text("""
+    SELECT service_name, health_status, timestamp, bucket
+    FROM cloudera_service_status
+    WHERE timestamp > :since;
+    """)
+
+    service_status_cache.refresh(engine, query, categorical=['service_name', 'health_status'])
+
+    # Keep the latest status per service and day, reducing the cache batch by batch
+    batches = (batch.assign(date=batch['timestamp'].dt.date.astype(str))
+               for batch in service_status_cache.iter_batches(categorical=['service_name', 'health_status']))
+    df = latest_per_key(batches, ['service_name', 'date'], 'timestamp')
+    if df.empty:
+        print("No data retrieved from the database.")
+        return None
+    df[['service_name', 'health_status']] = df[['service_name', 'health_status']].astype(str)
+
+    # Pivot data: Service Names as rows, Dates as columns, Health Status as values
+    pivot_df = df.pivot(index='service_name', columns='date', values='health_status').fillna("N/A")
+
+    # Define status colors
+    status_colors = {
+        "GOOD": "#4CAF50",
+        "CONCERNING": "#FF9800",
+        "BAD": "#F44336",
+        "N/A": "#BDBDBD"
+    }
+
+    # Get unique services and dates from the DataFrame
+    services = pivot_df.index.tolist()
+    dates = pivot_df.columns.tolist()
+
+    # Create a Figure and Set Dynamic Size
+    num_rows = len(services)
+    num_cols = len(dates)
+    fig, ax = plt.subplots(figsize=(max(8, num_cols * 1.2), max(5, num_rows * 0.6)))
+
+    # Draw Colored Blocks
+    for i in range(num_rows):
+        for j in range(num_cols):
+            value = pivot_df.iloc[i, j]
+            color = status_colors.get(value, "white")
+            ax.add_patch(plt.Rectangle((j, num_rows - i - 1), 1, 1, color=color, ec='black', lw=1))
+
+    # Set Axis Labels
+    ax.set_xticks([i + 0.5 for i in range(num_cols)])
+    ax.set_xticklabels(dates, fontsize=12, rotation=45, ha='right')
+    ax.set_yticks([i + 0.5 for i in range(num_rows)])
+    ax.set_yticklabels(services, fontsize=12, fontweight="bold", ha='right')
+
+    ax.set_xlim(0, num_cols)
+    ax.set_ylim(0, num_rows)
+    ax.tick_params(axis='x', bottom=False, top=True, labeltop=True, labelbottom=False)
+    ax.tick_params(axis='y', left=False, right=True, labelright=False, labelleft=True)
+
+    plt.title("Cloudera Service Health Status (Last 7 Days)", fontsize=14, fontweight="bold")
+
+    # Legend
+    legend_labels = ["GOOD", "CONCERNING", "BAD", "N/A"]
+    legend_colors = [status_colors["GOOD"], status_colors["CONCERNING"], status_colors["BAD"], status_colors["N/A"]]
+    ax.legend(
+        handles=[plt.Rectangle((0, 0), 1, 1, color=color) for color in legend_colors],
+        labels=legend_labels,
+        loc="upper right",
+        fontsize=12,
+        frameon=True
+    )
+
+    # Save Image with Timestamp
+    timestamp = pd.Timestamp.now().strftime("%Y-%m-%d_%H-%M-%S")
+    image_path = f"{RESULT_DIR}/service_health_{timestamp}.png"
+    image_path = save_figure(fig, image_path, n_rows=num_rows, bbox_inches='tight')
+    plt.close(fig)
+    print(f"✅ Image saved at {image_path}")
+
+    return image_path
 
 # Function to send image to Mattermost
 def send_mattermost_image(image_path):
@@ -146,5 +167,10 @@ def send_mattermost_post(file_id, channel_id):
     else:
         print(f"❌ Failed to send Mattermost message: {response.text}")
 
-# Send to Mattermost
-send_mattermost_image(image_path)
+def main():
+    image_path = render_report()
+    if image_path:
+        send_mattermost_image(image_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+
+# pyplot is not thread-safe and must never open a window here; every worker renders off-screen
+os.environ["MPLBACKEND"] = "Agg"
+
+import importlib.util
+import mimetypes
+import requests
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+MATTERMOST_TOKEN = os.getenv("BEARER_TOKEN")
+MATTERMOST_CHANNEL_ID = os.getenv("CHANNEL_ID", "389wx7ehk38ajc46hex5ajndxe")
+
+MAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Reports in the order their images appear in the post; each script exposes render_report()
+REPORTS = [
+    ("Server Resource Usage", "1.system/3.maintain_old_viuslization.py"),
+    ("Database Table Contents Lock", "3.lock_table/1.lock_table.py"),
+    ("Cloudera Service Health Status", "4.service_status/2.service_status_visulization.py"),
+]
+
+def render(script):
+    """Load a report script by path in this worker process and render its image."""
+    path = os.path.join(MAIN_DIR, script)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.render_report()
+
+def render_all():
+    """Render every report in parallel and return (title, image_path) in REPORTS order."""
+    with ProcessPoolExecutor(max_workers=len(REPORTS)) as executor:
+        futures = [(title, executor.submit(render, script)) for title, script in REPORTS]
+
+        results = []
+        for title, future in futures:
+            try:
+                results.append((title, future.result()))
+            except Exception as e:
+                print(f"❌ Failed to render {title}: {e}")
+                results.append((title, None))
+    return results
+
+def upload_file(image_path):
+    """Upload one image to Mattermost and return its file id."""
+    with open(image_path, 'rb') as image_file:
+        files = {'files': (os.path.basename(image_path), image_file, mimetypes.guess_type(image_path)[0])}
+        data = {'channel_id': MATTERMOST_CHANNEL_ID}
+        response = requests.post('https://chat.rtarf.mi.th/api/v4/files',
+                                 headers={'Authorization': f'Bearer {MATTERMOST_TOKEN}'}, files=files, data=data)
+
+    if response.status_code != 201:
+        print(f"❌ Failed to upload image: {response.status_code}, {response.text}")
+        return None
+
+    return response.json().get('file_infos', [{}])[0].get('id')
+
+def send_mattermost_batch(header, results):
+    """
+    Send one Mattermost post with every image attached, in REPORTS order.
+
+    The per-report lines are written after uploading, so a report whose render
+    or upload failed is listed as not available instead of silently missing.
+    """
+    if not MATTERMOST_TOKEN or not MATTERMOST_CHANNEL_ID:
+        print("❌ Mattermost token or channel ID is missing. Skipping notification.")
+        return None
+
+    lines = [header]
+    file_ids = []
+    for title, image_path in results:
+        file_id = upload_file(image_path) if image_path else None
+        if file_id:
+            lines.append(f"- {title}")
+            file_ids.append(file_id)
+        else:
+            lines.append(f"- {title}: ❌ not available")
+
+    if not file_ids:
+        print("❌ No images were uploaded. Skipping notification.")
+        return None
+
+    post_data = {
+        "channel_id": MATTERMOST_CHANNEL_ID,
+        "message": "\n".join(lines),
+        "file_ids": file_ids
+    }
+    response = requests.post('https://chat.rtarf.mi.th/api/v4/posts',
+                             headers={'Authorization': f'Bearer {MATTERMOST_TOKEN}', 'Content-Type': 'application/json'},
+                             json=post_data)
+
+    if response.status_code == 201:
+        print(f"✅ Mattermost report sent with {len(file_ids)} images.")
+    else:
+        print(f"❌ Failed to send Mattermost message: {response.status_code}, {response.text}")
+    return response
+
+def main():
+    started = datetime.now()
+    results = render_all()
+    print(f"Rendered {len(results)} reports in {(datetime.now() - started).total_seconds():.1f}s")
+
+    send_mattermost_batch(f"📊 **Daily Maintenance Report**\n🕒 {started:%Y-%m-%d_%H-%M}", results)
+
+if __name__ == "__main__":
+    main()
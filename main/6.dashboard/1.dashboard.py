@@ -0,0 +1,350 @@
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import hmac
+import threading
+from collections import defaultdict
+import pandas as pd
+from aiohttp import web
+from sqlalchemy import create_engine, text
+from urllib.parse import quote_plus
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.inventory import server_list
+from common.stream_read import read_batches
+
+# Load environment variables
+load_dotenv()
+
+# Local by default; expose it deliberately (e.g. behind a reverse proxy) by setting DASHBOARD_HOST
+HOST = os.getenv("DASHBOARD_HOST", "127.0.0.1")
+PORT = int(os.getenv("DASHBOARD_PORT", 8080))
+# Collectors may push fresh samples to /api/ingest/<dataset> with this bearer token;
+# ingest is disabled when no token is configured
+INGEST_TOKEN = os.getenv("DASHBOARD_INGEST_TOKEN")
+# The database is polled for rows past the in-memory watermark as a fallback to pushes
+REFRESH_SECONDS = int(os.getenv("DASHBOARD_REFRESH_SECONDS", 60))
+TREND_DAYS = int(os.getenv("DASHBOARD_TREND_DAYS", 7))
+
+# Snapshot rows follow inventory order
+SERVER_ORDER = [s["name"] for s in server_list]
+
+# dataset -> (time column, query for rows newer than :since)
+DATASETS = {
+    "server_metrics": ("datetime_record", text("""
+        SELECT server_name, cpu_usage_percent, used_ram_gb, total_ram_gb, used_ram_percent,
+               used_disk_gb, total_disk_gb, used_disk_percent, datetime_record
+        FROM server_metrics
+        WHERE datetime_record > :since
+        ORDER BY datetime_record
+    """)),
+    "service_status": ("timestamp", text("""
+        SELECT service_name, health_status, timestamp
+        FROM cloudera_service_status
+        WHERE timestamp > :since
+        ORDER BY timestamp
+    """)),
+    "hdfs_usage": ("datetime_record", text("""
+        SELECT dfs_used_tb, dfs_remaining_tb, datetime_record
+        FROM hdfs_usage
+        WHERE datetime_record > :since
+        ORDER BY datetime_record
+    """)),
+}
+
+# Trend series -> server_metrics column averaged per hour
+TREND_METRICS = {"cpu": "cpu_usage_percent", "ram": "used_ram_percent", "disk": "used_disk_percent"}
+
+# Views affected by each dataset
+VIEWS = {
+    "server_metrics": ["snapshot", "trend"],
+    "service_status": ["services"],
+    "hdfs_usage": ["hdfs"],
+}
+
+# Database Connection
+db_config = {
+    'user': os.getenv('DB_USERNAME'),
+    'password': os.getenv('DB_PASSWORD'),
+    'host': os.getenv('DB_HOST'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'dbname': os.getenv('DB_NAME')
+}
+
+encoded_password = quote_plus(db_config['password'])
+connection_uri = f"postgresql+psycopg2://{db_config['user']}:{encoded_password}@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
+engine = create_engine(connection_uri)
+
+
+class DashboardState:
+    """
+    Pre-aggregated metrics held in memory.
+
+    Samples are folded in as they arrive (database poll or collector push). Each
+    view is rebuilt and serialized only when one of its inputs changed, so a
+    request costs a dictionary lookup, not a query or a render.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.watermarks = {}
+        self.latest_servers = {}                 # server -> latest record
+        self.trend = defaultdict(dict)           # server -> {hour: {metric: [sum, n]}}
+        self.latest_services = {}                # service -> (timestamp, status)
+        self.service_days = defaultdict(dict)    # service -> {date: (timestamp, status)}
+        self.hdfs = {}                           # hour -> (timestamp, used_tb, remaining_tb)
+        self.views = {}                          # view -> (etag, body)
+        self.dirty = {view for views in VIEWS.values() for view in views}
+
+    def apply(self, dataset, df):
+        """Fold a batch of rows of one dataset into the aggregates."""
+        if df.empty:
+            return
+        time_column = DATASETS[dataset][0]
+        times = pd.to_datetime(df[time_column])
+        if times.dt.tz is not None:
+            times = times.dt.tz_convert(None)
+        # NaN is not valid JSON; missing values are served as null
+        df = df.assign(**{time_column: times}).astype(object).where(df.notna(), None)
+
+        with self.lock:
+            getattr(self, f"_apply_{dataset}")(df)
+            newest = df[time_column].max()
+            if dataset not in self.watermarks or newest > self.watermarks[dataset]:
+                self.watermarks[dataset] = newest
+            self.dirty.update(VIEWS[dataset])
+
+    def _apply_server_metrics(self, df):
+        for row in df.itertuples(index=False):
+            # A host that could not be read has no totals; its metrics are not real samples
+            failed = row.total_disk_gb is None or row.total_ram_gb is None
+            current = self.latest_servers.get(row.server_name)
+            if current is None or row.datetime_record >= current["datetime_record"]:
+                record = row._asdict()
+                if failed:
+                    record.update({column: None for column in TREND_METRICS.values()})
+                record["failed"] = failed
+                self.latest_servers[row.server_name] = record
+
+            if failed:
+                continue
+            hour = row.datetime_record.floor("h")
+            sums = self.trend[row.server_name].setdefault(hour, {metric: [0.0, 0] for metric in TREND_METRICS})
+            for metric, column in TREND_METRICS.items():
+                value = getattr(row, column)
+                if value is not None:
+                    sums[metric][0] += value
+                    sums[metric][1] += 1
+
+    def _apply_service_status(self, df):
+        for row in df.itertuples(index=False):
+            sample = (row.timestamp, row.health_status)
+            if row.service_name not in self.latest_services or sample >= self.latest_services[row.service_name]:
+                self.latest_services[row.service_name] = sample
+            days = self.service_days[row.service_name]
+            day = row.timestamp.date()
+            if day not in days or sample >= days[day]:
+                days[day] = sample
+
+    def _apply_hdfs_usage(self, df):
+        for row in df.itertuples(index=False):
+            self.hdfs[row.datetime_record.floor("h")] = (row.datetime_record, row.dfs_used_tb, row.dfs_remaining_tb)
+
+    def evict(self):
+        """Drop aggregates that fell out of the trend window."""
+        cutoff = pd.Timestamp.now() - pd.Timedelta(days=TREND_DAYS)
+        with self.lock:
+            for hours in self.trend.values():
+                for hour in [h for h in hours if h < cutoff]:
+                    del hours[hour]
+            for days in self.service_days.values():
+                for day in [d for d in days if d < cutoff.date()]:
+                    del days[day]
+            for hour in [h for h in self.hdfs if h < cutoff]:
+                del self.hdfs[hour]
+            self.dirty.update(["trend", "services", "hdfs"])
+
+    def view(self, name):
+        """Return (etag, body) of a view, rebuilding it only if its inputs changed."""
+        with self.lock:
+            if name in self.dirty or name not in self.views:
+                body = json.dumps(getattr(self, f"_build_{name}")(), default=str).encode()
+                self.views[name] = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+                self.dirty.discard(name)
+            return self.views[name]
+
+    def _build_snapshot(self):
+        order = {name: i for i, name in enumerate(SERVER_ORDER)}
+        servers = sorted(self.latest_servers.values(), key=lambda r: (order.get(r["server_name"], len(order)), r["server_name"]))
+        return {"servers": servers}
+
+    def _build_trend(self):
+        series = {}
+        for server, hours in self.trend.items():
+            ordered = sorted(hours.items())
+            series[server] = {"t": [hour.isoformat() for hour, _ in ordered]}
+            for metric in TREND_METRICS:
+                series[server][metric] = [round(s[metric][0] / s[metric][1], 2) if s[metric][1] else None
+                                          for _, s in ordered]
+        return {"days": TREND_DAYS, "series": series}
+
+    def _build_hdfs(self):
+        history = [{"t": ts.isoformat(), "used_tb": used, "remaining_tb": remaining}
+                   for ts, used, remaining in sorted(self.hdfs.values())]
+        return {"latest": history[-1] if history else None, "history": history}
+
+    def _build_services(self):
+        days = sorted({day for service_days in self.service_days.values() for day in service_days})
+        grid = {service: [service_days.get(day, (None, "N/A"))[1] for day in days]
+                for service, service_days in sorted(self.service_days.items())}
+        latest = {service: status for service, (_, status) in sorted(self.latest_services.items())}
+        return {"latest": latest, "days": [day.isoformat() for day in days], "grid": grid}
+
+
+state = DashboardState()
+
+
+def pull_new_rows():
+    """Fold rows past each dataset's watermark into the state (runs in a worker thread)."""
+    window_start = pd.Timestamp.now() - pd.Timedelta(days=TREND_DAYS)
+    with engine.connect() as conn:
+        for dataset, (_, query) in DATASETS.items():
+            since = max(state.watermarks.get(dataset, window_start), window_start)
+            try:
+                for batch in read_batches(conn, query, {"since": since.to_pydatetime()}):
+                    state.apply(dataset, batch)
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Failed to refresh {dataset}: {e}")
+    state.evict()
+
+
+async def refresh_loop(app):
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, pull_new_rows)
+        except Exception as e:
+            print(f"❌ Database refresh failed: {e}")
+        await asyncio.sleep(REFRESH_SECONDS)
+
+
+async def start_background(app):
+    app["refresh"] = asyncio.create_task(refresh_loop(app))
+
+
+async def stop_background(app):
+    app["refresh"].cancel()
+
+
+async def handle_view(request):
+    name = request.match_info["view"]
+    if not hasattr(state, f"_build_{name}"):
+        raise web.HTTPNotFound()
+
+    etag, body = state.view(name)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+async def handle_ingest(request):
+    dataset = request.match_info["dataset"]
+    if dataset not in DATASETS:
+        raise web.HTTPNotFound()
+    if not INGEST_TOKEN:
+        raise web.HTTPForbidden(text="ingest is disabled: DASHBOARD_INGEST_TOKEN is not set")
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {INGEST_TOKEN}"):
+        raise web.HTTPUnauthorized()
+
+    records = await request.json()
+    state.apply(dataset, pd.DataFrame(records))
+    return web.json_response({"accepted": len(records)})
+
+
+async def handle_index(request):
+    return web.Response(text=INDEX_HTML, content_type="text/html")
+
+
+INDEX_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Maintain Dashboard</title>
+<style>
+body{font-family:sans-serif;margin:16px;color:#222}
+h2{margin:20px 0 6px}
+table{border-collapse:collapse;font-size:13px}
+td,th{border:1px solid #999;padding:3px 8px;text-align:center}
+th{background:#a9c9f8}
+.warn{background:yellow}.bad{background:#f44336;color:#fff}
+.GOOD{background:#4CAF50}.CONCERNING{background:#FF9800}.BAD{background:#F44336}.NA{background:#BDBDBD}
+svg{border:1px solid #ccc;margin:4px}
+</style></head><body>
+<h1>Maintain Dashboard</h1>
+<h2>Servers</h2><div id="snapshot"></div>
+<h2>HDFS</h2><div id="hdfs"></div>
+<h2>Services</h2><div id="services"></div>
+<h2>Disk trend (%)</h2><div id="trend"></div>
+<script>
+const etags = {};
+// Every value from the API is escaped before it goes into markup
+const esc = v => String(v ?? "").replace(/[&<>"']/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"})[c]);
+const STATUSES = ["GOOD", "CONCERNING", "BAD"];
+async function load(view, render) {
+  const headers = etags[view] ? {"If-None-Match": etags[view]} : {};
+  const res = await fetch("/api/" + view, {headers});
+  if (res.status !== 200) return;
+  etags[view] = res.headers.get("ETag");
+  document.getElementById(view).innerHTML = render(await res.json());
+}
+const level = v => v > 80 ? "bad" : (v > 70 ? "warn" : "");
+function snapshot(d) {
+  const rows = d.servers.map(s => `<tr><td>${esc(s.server_name)}</td>` +
+    (s.failed ? `<td colspan="3" class="bad">Connection Failed</td>` :
+      ["cpu_usage_percent", "used_ram_percent", "used_disk_percent"].map(k => `<td class="${level(s[k])}">${esc(s[k])}</td>`).join("")) +
+    `<td>${esc(s.datetime_record)}</td></tr>`).join("");
+  return `<table><tr><th>Name</th><th>CPU(%)</th><th>RAM(%)</th><th>Disk(%)</th><th>Date</th></tr>${rows}</table>`;
+}
+function line(values, width, height, max) {
+  if (!values.length) return "";
+  const step = width / Math.max(values.length - 1, 1);
+  const points = values.map((v, i) => v === null || !isFinite(v) ? null : `${(i * step).toFixed(1)},${(height - v / max * height).toFixed(1)}`)
+    .filter(p => p !== null).join(" ");
+  return `<svg width="${width}" height="${height}"><polyline fill="none" stroke="#1f77b4" points="${points}"/></svg>`;
+}
+function hdfs(d) {
+  if (!d.latest) return "No data";
+  const pct = d.history.map(h => 100 * h.used_tb / (h.used_tb + h.remaining_tb));
+  return `Used ${esc(d.latest.used_tb)} TB, remaining ${esc(d.latest.remaining_tb)} TB<br>` + line(pct, 600, 80, 100);
+}
+function services(d) {
+  const head = d.days.map(day => `<th>${esc(day)}</th>`).join("");
+  const rows = Object.entries(d.grid).map(([name, cells]) =>
+    `<tr><td>${esc(name)}</td>` + cells.map(c => `<td class="${STATUSES.includes(c) ? c : "NA"}">${esc(c)}</td>`).join("") + "</tr>").join("");
+  return `<table><tr><th>Service</th>${head}</tr>${rows}</table>`;
+}
+function trend(d) {
+  return Object.entries(d.series).map(([name, s]) => `<div>${esc(name)}<br>${line(s.disk, 400, 60, 100)}</div>`).join("");
+}
+function refresh() {
+  load("snapshot", snapshot); load("hdfs", hdfs); load("services", services); load("trend", trend);
+}
+refresh(); setInterval(refresh, 30000);
+</script></body></html>
+"""
+
+
+def main():
+    app = web.Application()
+    app.router.add_get("/", handle_index)
+    app.router.add_get("/api/{view}", handle_view)
+    app.router.add_post("/api/ingest/{dataset}", handle_ingest)
+    app.on_startup.append(start_background)
+    app.on_cleanup.append(stop_background)
+    web.run_app(app, host=HOST, port=PORT)
+
+
+if __name__ == "__main__":
+    main()
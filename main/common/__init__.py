@@ -0,0 +1,4 @@
+from dotenv import load_dotenv
+
+# The shared modules read their settings at import time, before the scripts call load_dotenv()
+load_dotenv()
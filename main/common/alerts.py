@@ -0,0 +1,201 @@
+import os
+import json
+import math
+import requests
+import pandas as pd
+
+MATTERMOST_TOKEN = os.getenv("BEARER_TOKEN")
+# Alerts fan out to every channel listed here, one batched post per channel per cycle
+ALERT_CHANNEL_IDS = [c for c in os.getenv("ALERT_CHANNEL_IDS", "389wx7ehk38ajc46hex5ajndxe").split(",") if c]
+ALERT_STATE_DIR = os.getenv("ALERT_STATE_DIR", "/home/user/airflow/maintain/maintain_refactor/alert_state")
+# A target that stays in breach is re-announced at most once per this many hours
+ALERT_REPEAT_HOURS = float(os.getenv("ALERT_REPEAT_HOURS", 24))
+
+HEALTH_LEVELS = {"GOOD": 0, "CONCERNING": 1, "BAD": 2}
+
+
+class Rule:
+    """
+    Threshold rule with hysteresis.
+
+    A target breaches when its value crosses `raise_at` and only recovers once it
+    crosses back past `clear_at`, so a value hovering around the threshold does not
+    flap. The breach must last `min_duration_minutes` before the rule fires.
+    """
+
+    def __init__(self, name, column, op, raise_at, clear_at, min_duration_minutes=0, message=None):
+        self.name = name
+        self.column = column
+        self.op = op
+        self.raise_at = raise_at
+        self.clear_at = clear_at
+        self.min_duration = pd.Timedelta(minutes=min_duration_minutes)
+        self.message = message or f"{column} {op} {raise_at}"
+
+    def breached(self, value):
+        return value > self.raise_at if self.op == ">" else value < self.raise_at
+
+    def recovered(self, value):
+        return value < self.clear_at if self.op == ">" else value > self.clear_at
+
+
+# dataset -> rules; thresholds follow the report colouring (>70 yellow, >80 red)
+RULES = {
+    "server_metrics": [
+        Rule("cpu_high", "cpu_usage_percent", ">", 80, 70, min_duration_minutes=10, message="CPU above 80%"),
+        Rule("ram_high", "used_ram_percent", ">", 80, 70, min_duration_minutes=10, message="RAM above 80%"),
+        Rule("disk_high", "used_disk_percent", ">", 80, 75, message="Disk above 80%"),
+    ],
+    "hdfs_usage": [
+        Rule("hdfs_remaining_low", "remaining_percent", "<", 20, 25, message="HDFS remaining below 20%"),
+    ],
+    "service_status": [
+        Rule("service_unhealthy", "health_level", ">", 0, 1, message="service health not GOOD"),
+    ],
+    "metastore_health": [
+        Rule("hive_locks_waiting", "lock_waiting", ">", 20, 5, message="more than 20 Hive locks waiting"),
+        Rule("hive_old_open_txn", "oldest_open_txn_age_s", ">", 6 * 3600, 3600, message="Hive transaction open for over 6 hours"),
+        Rule("hive_compaction_backlog", "compaction_queue_depth", ">", 100, 50, message="more than 100 compactions queued"),
+    ],
+    "disk_forecast": [
+        Rule("disk_full_soon", "days_until_full", "<", 30, 45, message="disk full within 30 days"),
+    ],
+}
+
+
+class AlertEngine:
+    """
+    Evaluates the rules of one dataset on every ingested sample.
+
+    Per (rule, target) state survives between collector runs in a JSON file, which
+    gives dedup: a firing target is announced once (and again only after
+    ALERT_REPEAT_HOURS), then once more when it resolves. Events of a cycle are
+    sent together by flush() and only count as announced once a channel accepted
+    them; otherwise they are sent again on the next cycle.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.rules = RULES[dataset]
+        self.state_path = os.path.join(ALERT_STATE_DIR, f"{dataset}.json")
+        self.state = self._load_state()
+        # state key -> (kind, rule, target, value, ts); the latest event of a target wins
+        self.events = {}
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def evaluate(self, target, values, ts):
+        """Evaluate every rule for one sample of `target`; `values` maps column -> value."""
+        ts = pd.Timestamp(ts)
+        for rule in self.rules:
+            value = values.get(rule.column)
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            self._step(rule, target, float(value), ts)
+
+    def evaluate_frame(self, df, target_column, time_column):
+        """Evaluate every row of a collected batch."""
+        for record in df.to_dict(orient="records"):
+            self.evaluate(record[target_column], record, record[time_column])
+
+    def _step(self, rule, target, value, ts):
+        key = f"{rule.name}|{target}"
+        entry = self.state.get(key, {"status": "ok"})
+        status = entry["status"]
+
+        if status == "ok":
+            if rule.breached(value):
+                entry = {"status": "pending", "since": ts.isoformat()}
+                status = "pending"
+            else:
+                return
+
+        if status == "pending":
+            if not rule.breached(value):
+                self.state.pop(key, None)
+                return
+            if ts - pd.Timestamp(entry["since"]) >= rule.min_duration:
+                entry["status"] = "firing"
+                entry["notified_at"] = None
+                self.events[key] = ("FIRING", rule, target, value, ts)
+
+        elif status == "firing":
+            announced = entry.get("notified_at") is not None
+            if rule.recovered(value):
+                self.events.pop(key, None)
+                if not announced:
+                    # Never announced, so there is nothing to resolve
+                    self.state.pop(key, None)
+                    return
+                entry["status"] = "resolved"
+                self.events[key] = ("RESOLVED", rule, target, value, ts)
+            elif not announced:
+                self.events[key] = ("FIRING", rule, target, value, ts)
+            elif ts - pd.Timestamp(entry["notified_at"]) >= pd.Timedelta(hours=ALERT_REPEAT_HOURS):
+                self.events[key] = ("STILL FIRING", rule, target, value, ts)
+
+        elif status == "resolved":
+            # Announced as firing, resolution not delivered yet
+            if rule.breached(value):
+                entry["status"] = "firing"
+                self.events.pop(key, None)
+            else:
+                self.events[key] = ("RESOLVED", rule, target, value, ts)
+
+        entry["value"] = value
+        self.state[key] = entry
+
+    def _mark_sent(self):
+        for key, (kind, _, _, _, ts) in self.events.items():
+            if kind == "RESOLVED":
+                self.state.pop(key, None)
+            else:
+                self.state[key]["notified_at"] = ts.isoformat()
+        self.events = {}
+
+    def _save_state(self):
+        os.makedirs(ALERT_STATE_DIR, exist_ok=True)
+        with open(self.state_path, "w") as f:
+            json.dump(self.state, f, indent=1)
+
+    def flush(self):
+        """Send this cycle's events as one post per channel and persist the rule state."""
+        if not self.events:
+            self._save_state()
+            return
+
+        icons = {"FIRING": "🔴", "STILL FIRING": "🟠", "RESOLVED": "✅"}
+        lines = [f"🚨 **{self.dataset} alerts**"]
+        lines += [f"{icons[kind]} {kind}: **{target}** {rule.message} (value {value:g})"
+                  for kind, rule, target, value, _ in self.events.values()]
+        message = "\n".join(lines)
+        print(message)
+
+        sent = False
+        if not MATTERMOST_TOKEN:
+            print("❌ Mattermost token is missing. Alerts stay pending for the next run.")
+        else:
+            headers = {'Authorization': f'Bearer {MATTERMOST_TOKEN}', 'Content-Type': 'application/json'}
+            for channel_id in ALERT_CHANNEL_IDS:
+                try:
+                    response = requests.post('https://chat.rtarf.mi.th/api/v4/posts', headers=headers,
+                                             json={"channel_id": channel_id, "message": message}, timeout=10)
+                    if response.status_code == 201:
+                        sent = True
+                    else:
+                        print(f"❌ Failed to send alert to {channel_id}: {response.status_code}, {response.text}")
+                except requests.RequestException as e:
+                    print(f"❌ Failed to send alert to {channel_id}: {e}")
+
+        if sent:
+            self._mark_sent()
+        else:
+            if MATTERMOST_TOKEN:
+                print("❌ Alerts were not delivered to any channel; they are retried on the next run.")
+            self.events = {}
+        self._save_state()
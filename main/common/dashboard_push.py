@@ -0,0 +1,21 @@
+import os
+import requests
+
+# Live dashboard (6.dashboard); pushing is skipped when DASHBOARD_URL is not set
+DASHBOARD_URL = os.getenv("DASHBOARD_URL")
+DASHBOARD_INGEST_TOKEN = os.getenv("DASHBOARD_INGEST_TOKEN")
+
+
+def push_to_dashboard(dataset, df):
+    """Push fresh rows to the live dashboard if DASHBOARD_URL is set."""
+    if not DASHBOARD_URL:
+        return
+    headers = {'Content-Type': 'application/json'}
+    if DASHBOARD_INGEST_TOKEN:
+        headers['Authorization'] = f'Bearer {DASHBOARD_INGEST_TOKEN}'
+    try:
+        response = requests.post(f"{DASHBOARD_URL}/api/ingest/{dataset}", headers=headers,
+                                 data=df.to_json(orient='records', date_format='iso'), timeout=5)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Error pushing {dataset} to the dashboard: {e}")
@@ -0,0 +1,94 @@
+import io
+import os
+from PIL import Image
+
+# Delivered format: "png" (palette PNG) or "webp" (lossless WebP)
+IMAGE_FORMAT = os.getenv("REPORT_IMAGE_FORMAT", "png")
+# Upper bound for one delivered image in bytes; resolution is stepped down until it fits
+IMAGE_BYTE_BUDGET = int(os.getenv("REPORT_IMAGE_BUDGET", 300_000))
+# Also keep a vector copy next to the image for the archive
+ARCHIVE_SVG = os.getenv("REPORT_ARCHIVE_SVG", "0") == "1"
+
+# Reports are mostly text on a few flat fills, so a small palette is visually lossless
+PALETTE_COLORS = 64
+# Smaller palettes tried, in order, when the minimum resolution is still over budget
+FALLBACK_PALETTES = (32, 16)
+BASE_DPI = 100
+# A table with BASE_ROWS rows renders at BASE_DPI; more rows get proportionally more pixels
+BASE_ROWS = 12
+MIN_SCALE, MAX_SCALE = 0.75, 2.0
+
+
+def adaptive_scale(n_rows=None):
+    """Resolution multiplier for a table/heatmap with n_rows rows."""
+    if not n_rows:
+        return 1.0
+    return min(MAX_SCALE, max(MIN_SCALE, n_rows / BASE_ROWS))
+
+
+def encode(png_bytes, fmt=IMAGE_FORMAT, colors=PALETTE_COLORS):
+    """Quantize a rendered PNG to a small palette and encode it as palette PNG or WebP."""
+    image = Image.open(io.BytesIO(png_bytes)).convert("RGB")
+    image = image.quantize(colors=colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+
+    out = io.BytesIO()
+    if fmt == "webp":
+        image.convert("RGB").save(out, format="WEBP", lossless=True, method=4)
+    else:
+        image.save(out, format="PNG", compress_level=9)
+    return out.getvalue()
+
+
+def save_rendered(render, image_path, scale=1.0, fmt=IMAGE_FORMAT, budget=IMAGE_BYTE_BUDGET):
+    """
+    Encode render(scale) -> PNG bytes and write it within the byte budget.
+
+    Resolution is stepped down to MIN_SCALE first, then the palette is shrunk;
+    an image that still does not fit is written anyway with a warning.
+    Returns the written path, whose extension follows `fmt`.
+    """
+    rendered = render(scale)
+    data = encode(rendered, fmt)
+    while len(data) > budget and scale > MIN_SCALE:
+        scale = max(MIN_SCALE, scale * 0.8)
+        rendered = render(scale)
+        data = encode(rendered, fmt)
+
+    colors = PALETTE_COLORS
+    for fallback in FALLBACK_PALETTES:
+        if len(data) <= budget:
+            break
+        colors = fallback
+        data = encode(rendered, fmt, colors)
+
+    output_path = f"{os.path.splitext(image_path)[0]}.{fmt}"
+    with open(output_path, "wb") as f:
+        f.write(data)
+    print(f"Encoded {os.path.basename(output_path)}: {len(data) / 1024:.0f} KiB at scale {scale:.2f}, {colors} colors")
+    if len(data) > budget:
+        print(f"⚠️ {os.path.basename(output_path)} is {len(data) / 1024:.0f} KiB, over the {budget / 1024:.0f} KiB budget")
+    return output_path
+
+
+def save_figure(fig, image_path, n_rows=None, **savefig_kwargs):
+    """Save a matplotlib figure through the compact output stage and return the written path."""
+    if ARCHIVE_SVG:
+        fig.savefig(f"{os.path.splitext(image_path)[0]}.svg", format="svg", **savefig_kwargs)
+
+    def render(scale):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=BASE_DPI * scale, **savefig_kwargs)
+        return buffer.getvalue()
+
+    return save_rendered(render, image_path, adaptive_scale(n_rows))
+
+
+def save_plotly_figure(fig, image_path, n_rows=None):
+    """Save a plotly figure through the compact output stage and return the written path."""
+    import plotly.io as pio
+
+    if ARCHIVE_SVG:
+        pio.write_image(fig, f"{os.path.splitext(image_path)[0]}.svg", format="svg")
+
+    return save_rendered(lambda scale: pio.to_image(fig, format="png", scale=scale),
+                         image_path, adaptive_scale(n_rows))
@@ -0,0 +1,35 @@
+import re
+
+# Fleet inventory shared by the collectors and the fan-out runner.
+# Credentials are read from the named environment variables at connect time.
+server_list = [
+    {"name": "BI Server", "ip": "10.104.5.86", "username_env": "BI_SERVER_USER", "password_env": "BI_SERVER_PASS"},
+    {"name": "Talend Server 1", "ip": "10.104.5.87", "username_env": "TALEND1_USER", "password_env": "TALEND1_PASS"},
+    {"name": "Talend Server 2", "ip": "10.104.5.88", "username_env": "TALEND2_USER", "password_env": "TALEND2_PASS"},
+    {"name": "Scheduler Server", "ip": "10.104.5.89", "username_env": "SCHEDULER_USER", "password_env": "SCHEDULER_PASS"},
+    {"name": "Repo Server", "ip": "10.104.5.80", "username_env": "REPO_USER", "password_env": "REPO_PASS"},
+    {"name": "Datanode 1", "ip": "10.104.117.134", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
+    {"name": "Datanode 2", "ip": "10.104.117.143", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
+    {"name": "Datanode 3", "ip": "10.104.117.145", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
+    {"name": "Gatewaynode", "ip": "10.104.117.129", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
+    {"name": "Activenode", "ip": "10.104.117.131", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
+    {"name": "Standbynode", "ip": "10.104.117.132", "username_env": "DATANODE_USER", "password_env": "DATANODE_PASS"},
+    {"name": "Backup", "ip": "10.104.5.161", "username_env": "BACKUP_USER", "password_env": "BACKUP_PASS"}
+]
+
+# Host groups as server-name patterns, the same split the reports use
+SERVER_GROUPS = {
+    "talend": "BI Server|Talend|Scheduler|Repo",
+    "hadoop": "Datanode|Gatewaynode|Activenode|Standbynode|Backup",
+}
+
+
+def select_servers(group=None, names=None):
+    """Return the inventory entries of a group ("all" or None for every host) and/or an explicit name list."""
+    servers = server_list
+    if group and group != "all":
+        servers = [s for s in servers if re.search(SERVER_GROUPS[group], s["name"])]
+    if names:
+        wanted = set(names)
+        servers = [s for s in servers if s["name"] in wanted or s["ip"] in wanted]
+    return servers
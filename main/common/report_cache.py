@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import pandas as pd
+from contextlib import closing
+
+from common.stream_read import BATCH_ROWS, read_batches
+
+CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "/home/user/airflow/maintain/maintain_refactor/cache")
+
+# Times are stored as fixed-width text so SQLite compares them correctly as strings
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+class WatermarkCache:
+    """
+    Local SQLite copy of one report dataset over a sliding window.
+
+    The newest time value held locally is the watermark: refresh() only asks
+    PostgreSQL for rows past it, upserts them by key (rows rewritten by an
+    upsert upstream replace their cached copy) and evicts rows that fell out
+    of the window.
+    """
+
+    def __init__(self, name, time_column, key_columns, window_days):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite")
+        self.table = name
+        self.time_column = time_column
+        self.key_columns = key_columns
+        self.window_days = window_days
+
+    def window_start(self):
+        return pd.Timestamp.now() - pd.Timedelta(days=self.window_days)
+
+    def watermark(self, db):
+        """Return the newest cached time value, or None when the cache is empty."""
+        if not self._has_table(db):
+            return None
+        value = db.execute(f"SELECT MAX({self.time_column}) FROM {self.table}").fetchone()[0]
+        return pd.Timestamp(value) if value else None
+
+    def refresh(self, engine, query, categorical=()):
+        """
+        Pull rows newer than the watermark and drop rows older than the window.
+
+        `query` must select the cached columns and filter on `{time_column} > :since`.
+        New rows are streamed batch by batch, so a cold start over the whole window
+        does not hold the full result in memory. Returns the number of rows fetched.
+        """
+        since = self.window_start()
+        with closing(sqlite3.connect(self.path)) as db:
+            watermark = self.watermark(db)
+            if watermark is not None and watermark > since:
+                since = watermark
+
+            fetched = 0
+            with engine.connect() as conn:
+                for batch in read_batches(conn, query, {"since": since.to_pydatetime()}, categorical=categorical):
+                    if not batch.empty:
+                        self._upsert(db, batch)
+                        fetched += len(batch)
+
+            if self._has_table(db):
+                db.execute(f"DELETE FROM {self.table} WHERE {self.time_column} < ?", (self.window_start().strftime(TIME_FORMAT),))
+            db.commit()
+
+        print(f"Cache {self.table}: {fetched} new rows since {since:%Y-%m-%d %H:%M:%S}")
+        return fetched
+
+    def iter_batches(self, batch_rows=BATCH_ROWS, categorical=()):
+        """Yield the cached rows in DataFrames of at most `batch_rows` rows."""
+        with closing(sqlite3.connect(self.path)) as db:
+            if not self._has_table(db):
+                return
+            for batch in pd.read_sql(f"SELECT * FROM {self.table}", db, chunksize=batch_rows,
+                                     parse_dates={self.time_column: TIME_FORMAT}):
+                yield batch.astype({name: "category" for name in categorical})
+
+    def _has_table(self, db):
+        return db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,)).fetchone() is not None
+
+    def _upsert(self, db, df):
+        df = df.assign(**{self.time_column: pd.to_datetime(df[self.time_column])})
+        if not self._has_table(db):
+            df.head(0).to_sql(self.table, db, index=False)
+            db.execute(f"CREATE UNIQUE INDEX {self.table}_key ON {self.table} ({', '.join(self.key_columns)})")
+
+        columns = ", ".join(df.columns)
+        placeholders = ", ".join("?" for _ in df.columns)
+        rows = df.astype(object).where(df.notna(), None)
+        rows = [tuple(v.strftime(TIME_FORMAT) if isinstance(v, pd.Timestamp) else v for v in row)
+                for row in rows.itertuples(index=False)]
+        db.executemany(f"INSERT OR REPLACE INTO {self.table} ({columns}) VALUES ({placeholders})", rows)
@@ -0,0 +1,63 @@
+import os
+import pandas as pd
+import pyarrow as pa
+
+BATCH_ROWS = int(os.getenv("STREAM_BATCH_ROWS", 50000))
+
+
+def read_batches(conn, query, params=None, batch_rows=BATCH_ROWS, categorical=()):
+    """
+    Stream a query through a server-side cursor and yield DataFrames of at most `batch_rows` rows.
+
+    Rows are converted column-wise through Arrow, so numeric columns arrive as
+    NumPy dtypes and the `categorical` columns (server_name, service_name, ...)
+    as pandas categoricals instead of Python object columns. Only one batch is
+    held in memory at a time.
+    """
+    result = conn.execution_options(stream_results=True, max_row_buffer=batch_rows).execute(query, params or {})
+    columns = list(result.keys())
+
+    empty = True
+    for rows in result.partitions(batch_rows):
+        empty = False
+        arrays = []
+        for name, values in zip(columns, zip(*rows)):
+            array = pa.array(values, from_pandas=True)
+            if pa.types.is_decimal(array.type):
+                # PostgreSQL NUMERIC arrives as Decimal; keep it as a float column
+                array = array.cast(pa.float64())
+            arrays.append(array.dictionary_encode() if name in categorical else array)
+        yield pa.Table.from_arrays(arrays, names=columns).to_pandas()
+
+    if empty:
+        yield pd.DataFrame(columns=columns)
+
+
+def read_frame(conn, query, params=None, batch_rows=BATCH_ROWS, categorical=()):
+    """Read a whole (already reduced) result set through read_batches into one compact DataFrame."""
+    frames = list(read_batches(conn, query, params, batch_rows, categorical))
+    if len(frames) == 1:
+        return frames[0]
+
+    # Batches carry their own dictionaries; align them so concat keeps the categorical dtype
+    for name in categorical:
+        categories = pd.api.types.union_categoricals([f[name] for f in frames]).categories
+        for f in frames:
+            f[name] = f[name].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def latest_per_key(batches, key, time_column):
+    """Reduce batches to the newest row per key incrementally; memory is bounded by the number of keys."""
+    latest = None
+    columns = None
+    for batch in batches:
+        columns = batch.columns
+        if batch.empty:
+            continue
+        candidates = batch if latest is None else pd.concat([latest, batch], ignore_index=True)
+        latest = (candidates.sort_values(time_column)
+                  .drop_duplicates(subset=key, keep="last")
+                  .reset_index(drop=True))
+    # An empty result keeps the columns of the batches it was given, so callers can still select them
+    return latest if latest is not None else pd.DataFrame(columns=columns)
@@ -0,0 +1,126 @@
+import gzip
+import io
+import os
+import importlib.util
+
+import pandas as pd
+import pytest
+
+MODULE_PATH = os.path.join(os.path.dirname(__file__), "..", "main", "2.hdfs", "2.fsimage_analyzer.py")
+spec = importlib.util.spec_from_file_location("fsimage_analyzer", MODULE_PATH)
+analyzer = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(analyzer)
+
+HEADER = ["Path", "Replication", "ModificationTime", "AccessTime", "PreferredBlockSize", "BlocksCount",
+          "FileSize", "NSQUOTA", "DSQUOTA", "Permission", "UserName", "GroupName"]
+
+# (path, replication, size, is_directory)
+INODES = [
+    ("/", 0, 0, True),
+    ("/warehouse", 0, 0, True),
+    ("/warehouse/db1", 0, 0, True),
+    ("/warehouse/db1/t1", 0, 0, True),
+    ("/warehouse/db1/t1/part-0", 3, 500, False),
+    ("/warehouse/db1/t1/part-1", 3, 50, False),
+    ("/warehouse/db1/t2/part-0", 2, 1000, False),
+    ("/warehouse/db2/t1/deep/part-0", 3, 10, False),
+    ("/user", 0, 0, True),
+    ("/user/alice/notes.txt", 1, 20, False),
+    ("/user/bob.txt", 3, 200, False),
+    ("/top.txt", 1, 7, False),
+]
+
+SMALL_FILE_BYTES = 100
+
+
+def synthetic_dump():
+    """An `hdfs oiv -p Delimited` dump of INODES as bytes."""
+    lines = ["\t".join(HEADER)]
+    for path, replication, size, is_directory in INODES:
+        permission = "drwxr-xr-x" if is_directory else "-rw-r--r--"
+        lines.append("\t".join([path, str(replication), "2024-01-01 00:00", "2024-01-01 00:00", "134217728",
+                                "0" if is_directory else "1", str(size), "-1", "-1", permission, "hdfs", "hdfs"]))
+    return ("\n".join(lines) + "\n").encode()
+
+
+EXPECTED = {
+    # path: (depth, bytes, raw_bytes, files, small_files)
+    "/": (0, 1787, 500 * 3 + 50 * 3 + 1000 * 2 + 10 * 3 + 20 + 200 * 3 + 7, 7, 4),
+    "/warehouse": (1, 1560, 500 * 3 + 50 * 3 + 1000 * 2 + 10 * 3, 4, 2),
+    "/user": (1, 220, 20 + 600, 2, 1),
+    "/warehouse/db1": (2, 1550, 1500 + 150 + 2000, 3, 1),
+    "/warehouse/db2": (2, 10, 30, 1, 1),
+    "/user/alice": (2, 20, 20, 1, 1),
+}
+
+
+def check_usage(usage):
+    usage = usage.set_index("path")
+    assert set(usage.index) == set(EXPECTED)
+    for path, (depth, size, raw, files, small) in EXPECTED.items():
+        row = usage.loc[path]
+        assert (row["depth"], row["bytes"], row["raw_bytes"], row["files"], row["small_files"]) == \
+            (depth, size, raw, files, small), path
+
+
+@pytest.mark.parametrize("chunk_rows", [2, 3, 5, 1000])
+def test_analyze_stream_across_chunks(chunk_rows):
+    usage = analyzer.analyze_stream(io.BytesIO(synthetic_dump()), depth=2,
+                                    small_file_bytes=SMALL_FILE_BYTES, chunk_rows=chunk_rows)
+    check_usage(usage)
+
+
+def test_analyze_local_file_plain_and_gzip(tmp_path):
+    plain = tmp_path / "fsimage.tsv"
+    plain.write_bytes(synthetic_dump())
+    packed = tmp_path / "fsimage.tsv.gz"
+    packed.write_bytes(gzip.compress(synthetic_dump()))
+
+    for path in (plain, packed):
+        check_usage(analyzer.analyze_local_file(str(path), 2, SMALL_FILE_BYTES))
+
+
+def test_depth_limits_prefixes():
+    usage = analyzer.analyze_stream(io.BytesIO(synthetic_dump()), depth=3,
+                                    small_file_bytes=SMALL_FILE_BYTES, chunk_rows=4)
+    deepest = usage[usage["depth"] == 3].set_index("path")
+    assert set(deepest.index) == {"/warehouse/db1/t1", "/warehouse/db1/t2", "/warehouse/db2/t1"}
+    assert deepest.loc["/warehouse/db1/t1", "files"] == 2
+
+
+def test_only_directories_gives_empty_result():
+    dump = "\t".join(HEADER) + "\n/\t0\tx\tx\t0\t0\t0\t-1\t-1\tdrwxr-xr-x\thdfs\thdfs\n"
+    usage = analyzer.analyze_stream(io.BytesIO(dump.encode()), depth=2, small_file_bytes=SMALL_FILE_BYTES)
+    assert usage.empty
+    assert list(usage.columns) == ["path", "depth"] + analyzer.COUNTERS
+
+
+def test_compute_deltas_with_disappeared_prefix():
+    previous = pd.DataFrame({
+        "path": ["/", "/warehouse", "/tmp"],
+        "depth": [0, 1, 1],
+        "bytes": [1000, 600, 300],
+        "raw_bytes": [3000, 1800, 900],
+        "files": [10, 6, 3],
+        "small_files": [4, 2, 2],
+    })
+    usage = pd.DataFrame({
+        "path": ["/", "/warehouse", "/user"],
+        "depth": [0, 1, 1],
+        "bytes": [1500, 1400, 100],
+        "raw_bytes": [4500, 4200, 300],
+        "files": [12, 11, 1],
+        "small_files": [3, 2, 1],
+    })
+
+    result = analyzer.compute_deltas(usage, previous).set_index("path")
+
+    assert result.loc["/", "bytes_delta"] == 500
+    assert result.loc["/warehouse", "files_delta"] == 5
+    # New prefix: the whole value is growth
+    assert result.loc["/user", "bytes_delta"] == 100
+    # Disappeared prefix: kept with zero totals and a negative delta
+    assert result.loc["/tmp", "bytes"] == 0
+    assert result.loc["/tmp", "bytes_delta"] == -300
+    assert result.loc["/tmp", "small_files_delta"] == -2
+    assert result["bytes"].dtype.kind == "i"